@@ -1,7 +1,11 @@
+import asyncio
 import os
-from sqlalchemy import create_engine, Column, Integer, String
+import time
+from sqlalchemy import create_engine, event, text, Column, Index, Integer, String
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.services.metrics import observe_stage
 
 # ==============================
 # Absolute path setup
@@ -10,15 +14,77 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # path to db folder's par
 DB_FOLDER = os.path.join(BASE_DIR, "../../db")        # adjust relative to app/db structure
 os.makedirs(DB_FOLDER, exist_ok=True)                 # ensure folder exists
 
-DATABASE_PATH = os.path.join(DB_FOLDER, "agrosense.db")
+# Connecting switches the file to WAL mode (see below), which rewrites its
+# header; point local and benchmark runs elsewhere (e.g. DATABASE_PATH=
+# db/agrosense.local.db, git-ignored) to keep the tracked db/agrosense.db clean
+DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join(DB_FOLDER, "agrosense.db"))
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
+
+# Pool sizing for the async engine (connections are cheap for SQLite, but each
+# one keeps its own prepared-statement cache, so we keep them around)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
 
 # ==============================
 # SQLAlchemy engine & session
 # ==============================
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": True})
+# Sync engine: schema creation and scripts. Request handlers use the async one.
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine (aiosqlite) used by the auth and guidelines services
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    connect_args={"cached_statements": DB_STATEMENT_CACHE},
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers (logins) proceed while a writer (signup) commits;
+    # NORMAL sync is safe with WAL and avoids an fsync per commit
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+event.listen(engine, "connect", _set_sqlite_pragmas)
+event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+
+# Per-statement timing for /metrics (stage "db.execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    # A connection runs one statement at a time
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is not None:
+        observe_stage("db.execute", time.perf_counter() - started)
+
+
+event.listen(async_engine.sync_engine, "before_cursor_execute", _before_execute)
+event.listen(async_engine.sync_engine, "after_cursor_execute", _after_execute)
+
+# SQLite allows one writer at a time. Queue commits in-process instead of
+# letting connections spin on busy_timeout, which polls with growing sleeps.
+write_lock = asyncio.Lock()
+
+
+async def get_db():
+    """FastAPI dependency: one AsyncSession per request, closed afterwards."""
+    async with AsyncSessionLocal() as session:
+        yield session
+
 Base = declarative_base()
 
 # ==============================
@@ -27,7 +93,8 @@ Base = declarative_base()
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, unique=True, index=True)
+    # The services and API call it "email"; existing databases store it in "username"
+    email = Column("username", String, unique=True, index=True)
     password = Column(String)
 class Guidelines(Base):
     __tablename__ = "guidelines"
@@ -35,7 +102,29 @@ class Guidelines(Base):
     crop_name = Column(String, index=True)
     disease_name = Column(String, index=True)
     instructions = Column(String)
+    # Lookups are by (crop, disease); see guidelines_service
+    __table_args__ = (Index("ix_guidelines_crop_disease", "crop_name", "disease_name"),)
+
+class GuidelinesVersion(Base):
+    # Single row, bumped by triggers whenever guidelines change, so every
+    # worker can tell its in-memory copy is stale with one cheap query
+    __tablename__ = "guidelines_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+GUIDELINES_VERSION_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS guidelines_version_{op.lower()} AFTER {op} ON guidelines
+    BEGIN UPDATE guidelines_version SET version = version + 1 WHERE id = 1; END"""
+    for op in ("INSERT", "UPDATE", "DELETE")
+]
 # ==============================
 # Create tables
 # ==============================
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+Base.metadata.create_all(bind=engine)
+with engine.begin() as conn:
+    # create_all skips indexes and triggers of tables that already exist
+    for index in Guidelines.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    conn.execute(text("INSERT OR IGNORE INTO guidelines_version (id, version) VALUES (1, 0)"))
+    for trigger in GUIDELINES_VERSION_TRIGGERS:
+        conn.execute(text(trigger))
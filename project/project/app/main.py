@@ -1,51 +1,158 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-import requests
-import os, joblib
+from typing import List, Optional
+import os
 from dotenv import load_dotenv
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder
 import numpy as np
+from app.services.encoding import encode_input, decode_output, build_category_index, build_decode_table
+from app.services.prediction_cache import PredictionCache
+from app.services.executors import InferenceRejected, pool_stats, shutdown_pools
+from app.services.metrics import CONTENT_TYPE, MetricsMiddleware, collector, render, span, timed
+from app.services.geocoding import GeocodingError, close_client, geocode_stats, load_state_index, lookup_state
+from app.services.model_registry import MODEL_LOADING, ModelUnavailable, load_joblib_artifact, registry
+from app.db.database import AsyncSessionLocal, async_engine
+from app.services.guidelines_service import guideline_store
+from app.services.image_service import image_batcher
+from app.services.ml_model import disease_batcher
+from app.services.result_cache import result_cache_stats
+from app.services.tabular_io import OUTPUT_FORMATS, TabularFormatError, input_format, iter_encoded, iter_frames
+from app.services.token_service import PROTECTED
+from app.services.tree_engine import compile_model, predict_rows
+from app.utils.logger import logging_stats
 
 
 # ==============================
 # Model Loading
 # ==============================
-# Load all models once at application startup to improve performance
-def encode_input(value, column, encoders):
-    if value not in encoders[column]:
-        raise ValueError(f"Unknown category '{value}' for column '{column}'")
-    return encoders[column].index(value)
-def decode_output(value,column, decoders):
-    categories=decoders[column]
-    if value<0 or value>len(categories):
-        raise ValueError(f"Unknown category code '{value}' for column '{column}'")
-    return categories[value]
-try:
-    load_dotenv()
-    Yield_model_path = os.getenv("Yield_model", "models/Yield_model.pkl")
-    Yield_model_artifacts = joblib.load(Yield_model_path)
-    Yield_model=Yield_model_artifacts["Yield_model"]
-    Yield_input_categories =Yield_model_artifacts["Yield_categories"]
-
-    Best_time_path = os.getenv("Best_time", "models/Best_time.pkl")
-    Best_time_artifacts = joblib.load(Best_time_path)
-    Best_time_model = Best_time_artifacts["Best_time_model"]
+# Models are registered with the model registry (app/services/model_registry.py)
+# and loaded on first use, or in parallel at startup with MODEL_LOADING=eager.
+# Replacing an artifact file loads it as a new version in the background
+# (MODEL_HOT_RELOAD); responses report the version that produced them.
+# Category lists are turned into dict indexes at load time (see
+# app/services/encoding.py) so request handlers never scan or re-normalize them.
+load_dotenv()
+
+YIELD_MODEL_PATH = os.getenv("Yield_model", "models/Yield_model.pkl")
+BEST_TIME_MODEL_PATH = os.getenv("Best_time", "models/Best_time.pkl")
+SOIL_MODEL_PATH = os.getenv("Soil_model", "models/Soil_model.pkl")
+
+# Best-time and soil-nutrient predictions depend only on (crop, state) and
+# (soil_type, state), so they are memoized per model version. With PREDICTION_CACHE_PREWARM every
+# combination is computed at load time and those paths become dict lookups.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_PREWARM = os.getenv("PREDICTION_CACHE_PREWARM", "false").lower() in ("1", "true", "yes")
+best_time_cache = PredictionCache("best_time", maxsize=PREDICTION_CACHE_SIZE)
+soil_nutrient_cache = PredictionCache("soil_nutrient", maxsize=PREDICTION_CACHE_SIZE)
+
+# Feature order each model was trained on. With TREE_ENGINE the forests are
+# also compiled to array form at load (app/services/tree_engine.py), and small
+# inputs skip the DataFrame + sklearn path.
+YIELD_COLUMNS = ["Crop", "State", "Fertilizer"]
+BEST_TIME_COLUMNS = ["Crop", "State"]
+SOIL_COLUMNS = ["Soil_Type", "State"]
+
+
+def load_yield_artifacts():
+    Yield_model_artifacts = load_joblib_artifact(YIELD_MODEL_PATH)
+    Yield_input_categories = Yield_model_artifacts["Yield_categories"]
+    return {
+        "model": Yield_model_artifacts["Yield_model"],
+        "compiled": compile_model(Yield_model_artifacts["Yield_model"], YIELD_COLUMNS),
+        "categories": Yield_input_categories,
+        "index": build_category_index(Yield_input_categories),
+    }
+
+
+def load_best_time_artifacts():
+    Best_time_artifacts = load_joblib_artifact(BEST_TIME_MODEL_PATH)
     Best_time_input_categories = Best_time_artifacts["Best_time_input_categories"]
-    Best_time_output_encoders=Best_time_artifacts["Best_time_output_encoders"]
+    return {
+        "model": Best_time_artifacts["Best_time_model"],
+        "compiled": compile_model(Best_time_artifacts["Best_time_model"], BEST_TIME_COLUMNS),
+        "categories": Best_time_input_categories,
+        "index": build_category_index(Best_time_input_categories),
+        "output_table": build_decode_table(Best_time_artifacts["Best_time_output_encoders"]),
+    }
+
+
+def load_soil_artifacts():
+    Soil_model_artifacts = load_joblib_artifact(SOIL_MODEL_PATH)
+    Soil_input_categories = Soil_model_artifacts["Soil_categories"]
+    return {
+        "model": Soil_model_artifacts["Soil_model"],
+        "compiled": compile_model(Soil_model_artifacts["Soil_model"], SOIL_COLUMNS),
+        "categories": Soil_input_categories,
+        "index": build_category_index(Soil_input_categories),
+    }
+
+
+def warm_up_yield(artifacts):
+    """Test prediction on a new version; a broken artifact fails here instead of in requests."""
+    y = np.asarray(predict_rows(artifacts, [[0, 0, 0.0]], YIELD_COLUMNS))
+    if y.shape != (1, 2) or not np.isfinite(y).all():
+        raise ValueError(f"yield model returned {y!r} for a test row, expected 2 finite values")
+
+
+def warm_up_best_time(artifacts):
+    code = predict_rows(artifacts, [[0, 0]], BEST_TIME_COLUMNS)[0]
+    decode_output(code, "Best_time", artifacts["output_table"])
+
+
+def warm_up_soil(artifacts):
+    y = np.asarray(predict_rows(artifacts, [[0, 0]], SOIL_COLUMNS))
+    if y.shape[0] != 1 or y.shape[-1] < 3 or not np.isfinite(y).all():
+        raise ValueError(f"soil model returned {y!r} for a test row, expected N, P, K")
+
+
+def reset_best_time_cache(loaded):
+    """Drop predictions of the previous version; optionally pre-warm every (crop, state)."""
+    best_time_cache.clear()
+    if not PREDICTION_CACHE_PREWARM:
+        return
+    best_time = loaded.value
+    crops = range(len(best_time["categories"]["Crop"]))
+    states = range(len(best_time["categories"]["State"]))
+    pairs = [(c, s) for c in crops for s in states]
+    if pairs:
+        codes = predict_rows(best_time, pairs, BEST_TIME_COLUMNS)
+        for (c, s), code in zip(pairs, codes):
+            best_time_cache.put((loaded.version, c, s), decode_output(code, "Best_time", best_time["output_table"]))
+
+
+def reset_soil_nutrient_cache(loaded):
+    """Drop predictions of the previous version; optionally pre-warm every (soil_type, state)."""
+    soil_nutrient_cache.clear()
+    if not PREDICTION_CACHE_PREWARM:
+        return
+    soil = loaded.value
+    soils = range(len(soil["categories"]["Soil_Type"]))
+    states = range(len(soil["categories"]["State"]))
+    pairs = [(t, s) for t in soils for s in states]
+    if pairs:
+        y_reg_pred = np.asarray(predict_rows(soil, pairs, SOIL_COLUMNS))
+        for i, (t, s) in enumerate(pairs):
+            soil_nutrient_cache.put((loaded.version, t, s), y_reg_pred[i:i + 1])
 
-    Soil_model_path = os.getenv("Soil_model", "models/Soil_model.pkl")
-    Soil_model_artifacts = joblib.load(Soil_model_path)
-    Soil_model= Soil_model_artifacts["Soil_model"]
-    Soil_input_categories =Soil_model_artifacts["Soil_categories"]
-    
 
-except FileNotFoundError as e:
-    print(f"Warning: Model file not found. Prediction functionality may be limited. Error: {e}")
-    Yield_model, Best_time_model, Soil_model = None, None, None
-    Yield_input_categories,Best_time_output_encoders,Best_time_input_categories,Soil_input_encoders= None, None, None, None
+# Cache keys start with the model version: requests still running on the
+# previous version during a swap can't fill the cache with its predictions
+registry.register("yield", load_yield_artifacts, path=YIELD_MODEL_PATH, warmup=warm_up_yield)
+registry.register("best_time", load_best_time_artifacts, on_load=reset_best_time_cache,
+                  path=BEST_TIME_MODEL_PATH, warmup=warm_up_best_time)
+registry.register("soil", load_soil_artifacts, on_load=reset_soil_nutrient_cache,
+                  path=SOIL_MODEL_PATH, warmup=warm_up_soil)
+
+TABULAR_MODELS = ("yield", "best_time", "soil")
+
+
+def load_models():
+    """(Re)load the tabular model artifacts; their prediction caches are reset on load."""
+    for name in TABULAR_MODELS:
+        registry.reload(name)
+
 
 # Import all routers
 # NOTE: This assumes the routers are correctly structured in the app/routers directory
@@ -70,6 +177,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms per route template (app/services/metrics.py)
+app.add_middleware(MetricsMiddleware)
+
+# ==============================
+# Inference pools
+# ==============================
+# Vision/speech pools reject work beyond their admission limit instead of
+# queueing it forever (see app/services/executors.py)
+@app.exception_handler(InferenceRejected)
+async def inference_rejected_handler(request: Request, exc: InferenceRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.on_event("startup")
+def start_model_preload():
+    if MODEL_LOADING == "eager":
+        registry.preload()
+
+@app.on_event("startup")
+async def load_state_boundaries():
+    # Parsed in a thread, before the first /get-state
+    await load_state_index()
+
+@app.on_event("startup")
+async def load_guideline_store():
+    async with AsyncSessionLocal() as db:
+        await guideline_store.refresh(db)
+
+@app.on_event("shutdown")
+async def stop_background_clients():
+    shutdown_pools()
+    await close_client()
+    await async_engine.dispose()
+
 # ==============================
 # Routers
 # ==============================
@@ -104,20 +248,19 @@ class SoilRequest(BaseModel):
 # Yield Prediction Logic
 # ==============================
 def predict_yield(crop: str, state: str, area: float, fertilizer_used: float):
-    if Yield_model is None:
-        raise RuntimeError("Yield prediction model not loaded.")
-
-    # Normalize
-    crop = crop.capitalize()       # "rice" -> "Rice"
-    state = state.title()          # "maharashtra" -> "Maharashtra"
-
-    # Encode
-    x_reg_input = pd.DataFrame([[
-        encode_input(crop, "Crop", Yield_input_categories),
-        encode_input(state, "State", Yield_input_categories),
-        fertilizer_used
-    ]], columns=["Crop", "State", "Fertilizer"])
-    y_reg_pred=Yield_model.predict(x_reg_input)
+    # One version of each model for the whole request, even if a reload lands meanwhile
+    yield_model, best_time_model = registry.get_version("yield"), registry.get_version("best_time")
+    yield_artifacts = yield_model.value
+
+    # Encode (the index also matches "rice" / "maharashtra" style casing)
+    with span("yield.encode"):
+        row = [
+            encode_input(crop, "Crop", yield_artifacts["index"]),
+            encode_input(state, "State", yield_artifacts["index"]),
+            fertilizer_used
+        ]
+    with span("yield.predict"):
+        y_reg_pred = predict_rows(yield_artifacts, [row], YIELD_COLUMNS)
     # Assuming the model returns yield_per_ha and optimum_fertilizer
     yield_per_ha, optimum_fertilizer = y_reg_pred[0]
     
@@ -131,36 +274,126 @@ def predict_yield(crop: str, state: str, area: float, fertilizer_used: float):
     extra_fertilizer = max(0, optimum_fertilizer - fertilizer_used)
     
     # Call the best_time prediction function
-    best_time_name= predict_best_time(crop, state)
+    best_time_name= predict_best_time(crop, state, best_time_model)
     
     return {
         "yield_tons": round(predicted_yield, 2),
         "extra_needed_fertilizer_per_ha": round(extra_fertilizer, 2),
         "best_time": best_time_name,
+        "model_version": {"yield": yield_model.version, "best_time": best_time_model.version},
     }
 
+def predict_yield_batch(items: List["PredictionRequest"], yield_model=None, best_time_model=None):
+    """Vectorized counterpart of predict_yield.
+
+    Encodes every item, then runs Yield_model and Best_time_model once over
+    all valid rows. Items with unknown categories get an "error" entry in
+    their slot instead of failing the whole batch.
+    """
+    yield_model = yield_model or registry.get_version("yield")
+    best_time_model = best_time_model or registry.get_version("best_time")
+    yield_artifacts, best_time = yield_model.value, best_time_model.value
+
+    results = [None] * len(items)
+    yield_rows, best_time_rows, valid = [], [], []
+    with span("yield_batch.encode"):
+        for i, item in enumerate(items):
+            try:
+                yield_row = [
+                    encode_input(item.crop, "Crop", yield_artifacts["index"]),
+                    encode_input(item.state, "State", yield_artifacts["index"]),
+                    item.fertilizer_used,
+                ]
+                best_time_row = [
+                    encode_input(item.crop, "Crop", best_time["index"]),
+                    encode_input(item.state, "State", best_time["index"]),
+                ]
+            except ValueError as e:
+                results[i] = {"crop": item.crop, "state": item.state, "error": str(e)}
+                continue
+            yield_rows.append(yield_row)
+            best_time_rows.append(best_time_row)
+            valid.append(i)
+
+    if not valid:
+        return results
+
+    # One predict call per model for the whole batch
+    with span("yield_batch.predict"):
+        y_reg_pred = np.asarray(predict_rows(yield_artifacts, yield_rows, YIELD_COLUMNS))
+    # Best time comes from the cache where possible; misses share one predict call
+    best_time_names = [best_time_cache.get((best_time_model.version, *row)) for row in best_time_rows]
+    missing = [j for j, name in enumerate(best_time_names) if name is None]
+    if missing:
+        with span("best_time_batch.predict"):
+            y_cls_pred_codes = predict_rows(best_time, [best_time_rows[j] for j in missing], BEST_TIME_COLUMNS)
+        for j, code in zip(missing, y_cls_pred_codes):
+            try:
+                best_time_names[j] = decode_output(code, "Best_time", best_time["output_table"])
+            except ValueError as e:
+                best_time_names[j] = e
+                continue
+            best_time_cache.put((best_time_model.version, *best_time_rows[j]), best_time_names[j])
+
+    area = np.array([items[i].area for i in valid], dtype=float)
+    fertilizer_used = np.array([items[i].fertilizer_used for i in valid], dtype=float)
+    yield_per_ha, optimum_fertilizer = y_reg_pred[:, 0], y_reg_pred[:, 1]
+
+    # Same rules as predict_yield, applied column-wise
+    predicted_yield = np.where(fertilizer_used == 0, 0.6 * yield_per_ha * area, yield_per_ha * area)
+    extra_fertilizer = np.maximum(0, optimum_fertilizer - fertilizer_used)
+
+    for j, i in enumerate(valid):
+        item = items[i]
+        best_time_name = best_time_names[j]
+        if isinstance(best_time_name, ValueError):
+            results[i] = {"crop": item.crop, "state": item.state, "error": str(best_time_name)}
+            continue
+        results[i] = {
+            "crop": item.crop,
+            "state": item.state,
+            "area_ha": item.area,
+            "fertilizer_used_kg_per_ha": item.fertilizer_used,
+            "yield_metric_tons": round(float(predicted_yield[j]), 2),
+            "extra_needed_fertilizer_kg_per_ha": round(float(extra_fertilizer[j]), 2),
+            "best_time": best_time_name,
+        }
+    return results
+
 # ==============================
 # Best Time setup
 # ==============================
-def predict_best_time(crop:str,state:str):
-    if Best_time_model is None:
-        raise RuntimeError("Best time prediction model not loaded.")
+@timed("best_time.total")
+def predict_best_time(crop:str,state:str,best_time_model=None):
+    best_time_model = best_time_model or registry.get_version("best_time")
+    best_time = best_time_model.value
     
-    crop_code=encode_input(crop,"Crop", Best_time_input_categories)
-    state_code=encode_input(state,"State",Best_time_input_categories)
-    x_cls_input=pd.DataFrame([[crop_code,state_code]], columns=["Crop","State"])
-    y_cls_pred_codes = Best_time_model.predict(x_cls_input)[0]
-    Best_time_name=decode_output(y_cls_pred_codes, "Best_time",Best_time_output_encoders)
+    crop_code=encode_input(crop,"Crop", best_time["index"])
+    state_code=encode_input(state,"State",best_time["index"])
+    Best_time_name = best_time_cache.get((best_time_model.version, crop_code, state_code))
+    if Best_time_name is None:
+        with span("best_time.predict"):
+            y_cls_pred_codes = predict_rows(best_time, [[crop_code, state_code]], BEST_TIME_COLUMNS)[0]
+        Best_time_name=decode_output(y_cls_pred_codes, "Best_time",best_time["output_table"])
+        best_time_cache.put((best_time_model.version, crop_code, state_code), Best_time_name)
     return Best_time_name
     
 # ==============================
 # Soil Health Logic
 # ==============================
-def Soil_nutrient_predict(state: str, soil_type: str):
-    x_reg_input = pd.DataFrame([[
-    encode_input(soil_type, "Soil_Type", Soil_input_categories),
-    encode_input(state, "State", Soil_input_categories)]],columns=["Soil_Type","State"])
-    y_reg_pred=Soil_model.predict(x_reg_input)
+@timed("soil.total")
+def Soil_nutrient_predict(state: str, soil_type: str, soil_model=None):
+    soil_model = soil_model or registry.get_version("soil")
+    soil = soil_model.value
+
+    codes = (encode_input(soil_type, "Soil_Type", soil["index"]),
+             encode_input(state, "State", soil["index"]))
+    key = (soil_model.version, *codes)
+    y_reg_pred = soil_nutrient_cache.get(key)
+    if y_reg_pred is None:
+        with span("soil.predict"):
+            y_reg_pred = predict_rows(soil, [codes], SOIL_COLUMNS)
+        soil_nutrient_cache.put(key, y_reg_pred)
     return y_reg_pred
 
 
@@ -182,12 +415,117 @@ def calculate_soil_requirements(N_ppm: float, P_ppm: float, K_ppm: float):
         "Needed_P_Fertilizer": round(needed_P, 2),
         "Needed_K_Fertilizer": round(needed_K, 2),
     }
- 
+
+def calculate_soil_requirements_batch(N_ppm, P_ppm, K_ppm):
+    """Vectorized calculate_soil_requirements: same formulas over arrays of readings."""
+    N_ppm, P_ppm, K_ppm = (np.asarray(v, dtype=float) for v in (N_ppm, P_ppm, K_ppm))
+    needed_N = (np.maximum(0, 150 - N_ppm) * 1.95) / 0.50
+    needed_P = (np.maximum(0, 15 - P_ppm) * 1.95) / 0.30
+    needed_K = (np.maximum(0, 200 - K_ppm) * 1.95) / 0.60
+
+    norm_N = (N_ppm - 50) / 150
+    norm_P = (P_ppm - 5) / 15
+    norm_K = (K_ppm - 50) / 200
+
+    average = (norm_N + norm_P + norm_K) / 3
+    SHI = average * 100
+
+    return {
+        "SHI": np.round(SHI, 2),
+        "Needed_N_Fertilizer": np.round(needed_N, 2),
+        "Needed_P_Fertilizer": np.round(needed_P, 2),
+        "Needed_K_Fertilizer": np.round(needed_K, 2),
+    }
+
+
+def predict_soil_nutrients_batch(states, soil_types, soil_model=None):
+    """Vectorized Soil_nutrient_predict: an (n, 3) N/P/K array plus per-row errors.
+
+    Categories are encoded once per distinct value, and the (soil type, state)
+    pairs missing from the cache share one Soil_model.predict call.
+    """
+    soil_model = soil_model or registry.get_version("soil")
+    soil = soil_model.value
+    n = len(states)
+    npk = np.full((n, 3), np.nan)
+    errors = np.full(n, None, dtype=object)
+
+    pairs = pd.DataFrame({"Soil_Type": soil_types, "State": states})
+    codes = {}
+    for column, label in (("Soil_Type", "soil type"), ("State", "location")):
+        # Empty cells would otherwise become the category "nan"
+        values = pairs[column].astype(str).str.strip().where(pairs[column].notna(), "")
+        encoded = {"": ValueError(f"Missing {label}")}
+        for value in values.unique():
+            if value in encoded:
+                continue
+            try:
+                encoded[value] = encode_input(value, column, soil["index"])
+            except ValueError as e:
+                encoded[value] = e
+        codes[column] = values.map(encoded)
+
+    keys = {}
+    for i, (soil_code, state_code) in enumerate(zip(codes["Soil_Type"], codes["State"])):
+        if isinstance(soil_code, ValueError) or isinstance(state_code, ValueError):
+            errors[i] = str(soil_code if isinstance(soil_code, ValueError) else state_code)
+        else:
+            keys.setdefault((soil_code, state_code), []).append(i)
+
+    cached = {key: soil_nutrient_cache.get((soil_model.version, *key)) for key in keys}
+    missing = [key for key, value in cached.items() if value is None]
+    if missing:
+        with span("soil_bulk.predict"):
+            predictions = predict_rows(soil, missing, SOIL_COLUMNS)
+        for key, row in zip(missing, np.asarray(predictions)):
+            # Same shape as Soil_nutrient_predict's cached (1, 3) prediction
+            cached[key] = row[None, :]
+            soil_nutrient_cache.put((soil_model.version, *key), cached[key])
+    for key, rows in keys.items():
+        npk[rows] = cached[key][0][:3]
+    return npk, errors
+
+# Rows scored per chunk in /soil-health/bulk; bounds memory regardless of file size
+SOIL_BULK_CHUNK_ROWS = int(os.getenv("SOIL_BULK_CHUNK_ROWS", "10000"))
+SOIL_BULK_COLUMNS = ["soil_type", "location", "N_ppm", "P_ppm", "K_ppm"]
+
+@timed("soil_bulk.chunk")
+def score_soil_frame(frame: pd.DataFrame, soil_model=None) -> pd.DataFrame:
+    """Bulk /soil-health for one chunk: fill missing N/P/K cells from the model, then score every row.
+
+    Measured values are kept; only empty cells are predicted. N/P/K_from_farmer
+    say which values were measured.
+    """
+    missing_columns = [c for c in SOIL_BULK_COLUMNS if c not in frame.columns]
+    if missing_columns:
+        raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
+
+    npk = np.array(frame[["N_ppm", "P_ppm", "K_ppm"]].apply(pd.to_numeric, errors="coerce"), dtype=float)
+    measured = ~np.isnan(npk)
+    errors = np.full(len(frame), None, dtype=object)
+    to_predict = np.flatnonzero(~measured.all(axis=1))
+    if len(to_predict):
+        predicted, predict_errors = predict_soil_nutrients_batch(
+            frame["location"].to_numpy()[to_predict], frame["soil_type"].to_numpy()[to_predict], soil_model
+        )
+        npk[to_predict] = np.where(measured[to_predict], npk[to_predict], predicted)
+        errors[to_predict] = predict_errors
+
+    out = frame.copy()
+    out["used_NPK_from_farmer"] = measured.all(axis=1)
+    for column, from_farmer in zip("NPK", measured.T):
+        out[f"{column}_from_farmer"] = from_farmer
+    out[["N_ppm", "P_ppm", "K_ppm"]] = np.round(npk, 2)
+    for name, values in calculate_soil_requirements_batch(npk[:, 0], npk[:, 1], npk[:, 2]).items():
+        out[name] = values
+    out["error"] = errors
+    return out
+
 
 # ==============================
 # Endpoints
 # ==============================
-@app.post("/predict-yield", tags=["Yield Prediction"])
+@app.post("/predict-yield", tags=["Yield Prediction"], dependencies=PROTECTED)
 def get_yield_prediction(request: PredictionRequest):
     try:
         result = predict_yield(request.crop, request.state, request.area, request.fertilizer_used)
@@ -199,26 +537,40 @@ def get_yield_prediction(request: PredictionRequest):
             "yield_metric_tons": result["yield_tons"],
             "extra_needed_fertilizer_kg_per_ha": result["extra_needed_fertilizer_per_ha"],
             "best_time": result["best_time"],
+            "model_version": result["model_version"],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict-yield/batch", tags=["Yield Prediction"], dependencies=PROTECTED)
+def get_yield_prediction_batch(request: List[PredictionRequest]):
+    try:
+        yield_model, best_time_model = registry.get_version("yield"), registry.get_version("best_time")
+        return {
+            "results": predict_yield_batch(request, yield_model, best_time_model),
+            "model_version": {"yield": yield_model.version, "best_time": best_time_model.version},
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/get-state", tags=["GPS to State"])
-def get_state_from_gps(request: GPSRequest):
+@app.post("/get-state", tags=["GPS to State"], dependencies=PROTECTED)
+async def get_state_from_gps(request: GPSRequest):
+    # Cache -> local boundary index -> optional Nominatim fallback (app/services/geocoding.py)
     try:
-        url = f"https://nominatim.openstreetmap.org/reverse?lat={request.lat}&lon={request.lon}&format=json"
-        response = requests.get(url, headers={"User-Agent": "agrosense-app"})
-        if response.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to fetch location")
-        data = response.json()
-        state = data.get("address", {}).get("state", "Unknown")
-        return {"lat": request.lat, "lon": request.lon, "state": state}
+        state, source = await lookup_state(request.lat, request.lon)
+        return {"lat": request.lat, "lon": request.lon, "state": state, "source": source}
+    except GeocodingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/get-state/stats", tags=["GPS to State"])
+def get_geocode_stats():
+    return geocode_stats()
+
 from fastapi import HTTPException
 
-@app.post("/soil-health", tags=["Soil Health"])
+@app.post("/soil-health", tags=["Soil Health"], dependencies=PROTECTED)
 def get_soil_health(request: SoilRequest):
     try:
         # ==============================
@@ -232,6 +584,7 @@ def get_soil_health(request: SoilRequest):
                 )
             N, P, K = request.N_ppm, request.P_ppm, request.K_ppm
             used_from_farmer = True
+            model_version = None
 
         # ========================================
         # Case 2: Farmer does NOT have NPK values
@@ -239,9 +592,11 @@ def get_soil_health(request: SoilRequest):
         else:
             try:
                 # Predict using the Soil model
-                y_pred = Soil_nutrient_predict(request.location, request.soil_type)[0]
+                soil_model = registry.get_version("soil")
+                y_pred = Soil_nutrient_predict(request.location, request.soil_type, soil_model)[0]
                 N, P, K = y_pred[0], y_pred[1], y_pred[2]
                 used_from_farmer = False
+                model_version = soil_model.version
             except KeyError as e:
                 raise HTTPException(
                     status_code=400,
@@ -265,7 +620,8 @@ def get_soil_health(request: SoilRequest):
             "N_ppm": round(N, 2),
             "P_ppm": round(P, 2),
             "K_ppm": round(K, 2),
-            **result
+            **result,
+            "model_version": model_version,
         }
 
     except HTTPException as e:
@@ -278,6 +634,136 @@ def get_soil_health(request: SoilRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/soil-health/bulk", tags=["Soil Health"], dependencies=PROTECTED)
+def get_soil_health_bulk(file: UploadFile, format: str = "csv"):
+    """Score a lab file of samples (CSV, Parquet or Arrow) and stream the results back.
+
+    Columns: soil_type, location, N_ppm, P_ppm, K_ppm (any others pass through).
+    Empty N/P/K cells get predicted values (see N/P/K_from_farmer). Output is CSV or NDJSON.
+    """
+    if format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(OUTPUT_FORMATS)}")
+    try:
+        # Every chunk is scored by the same model version, reported in X-Model-Version
+        soil_model = registry.get_version("soil")
+    except ModelUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    try:
+        frames = iter_frames(file.file, input_format(file.filename), SOIL_BULK_CHUNK_ROWS)
+        # Score the first chunk now so bad files fail with a 400, not mid-stream
+        first = score_soil_frame(next(frames, pd.DataFrame(columns=SOIL_BULK_COLUMNS)), soil_model)
+    except (TabularFormatError, ValueError, pd.errors.ParserError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def scored():
+        yield first
+        for frame in frames:
+            yield score_soil_frame(frame, soil_model)
+
+    return StreamingResponse(iter_encoded(scored(), format), media_type=OUTPUT_FORMATS[format],
+                             headers={"X-Model-Version": soil_model.version})
+
+@app.get("/prediction-cache", tags=["Prediction Cache"])
+def get_prediction_cache_stats():
+    return {
+        "prewarm": PREDICTION_CACHE_PREWARM,
+        "caches": [best_time_cache.stats(), soil_nutrient_cache.stats()],
+    }
+
+@app.get("/result-cache", tags=["Prediction Cache"])
+def get_result_cache_stats():
+    # Image / disease / voice results keyed by upload hash (app/services/result_cache.py)
+    return {"caches": result_cache_stats()}
+
+@app.get("/inference-pools", tags=["Inference Pools"])
+def get_inference_pool_stats():
+    return {"pools": pool_stats()}
+
+@app.get("/health/models", tags=["Health"])
+def get_model_health():
+    return registry.status()
+
+@app.get("/metrics", tags=["Health"])
+def get_metrics():
+    # Prometheus text format: request/stage histograms plus the collectors below
+    return Response(render(), media_type=CONTENT_TYPE)
+
+@app.get("/health/logging", tags=["Health"])
+def get_logging_stats():
+    # Queue depth, dropped and sampled-out records (app/utils/logger.py)
+    return logging_stats()
+
+# ==============================
+# Metrics collectors
+# ==============================
+# Read on every /metrics scrape from the same stats the JSON endpoints serve
+@collector
+def collect_inference_pools():
+    pools = pool_stats()
+    for key, kind, help in (
+        ("in_flight", "gauge", "Requests admitted to the pool (running + waiting)."),
+        ("running", "gauge", "Tasks executing on a pool worker."),
+        ("waiting", "gauge", "Admitted requests waiting for a worker."),
+        ("max_pending", "gauge", "Admission limit; requests beyond it get 429."),
+        ("completed", "counter", "Tasks completed."),
+        ("rejected", "counter", "Requests rejected with 429/503."),
+    ):
+        name = f"agrosense_inference_pool_{key}" + ("_total" if kind == "counter" else "")
+        yield name, kind, help, [({"pool": p["name"]}, p[key]) for p in pools]
+    yield ("agrosense_inference_pool_utilization", "gauge", "Share of worker time spent running tasks.",
+           [({"pool": p["name"]}, p["utilization"]) for p in pools])
+
+@collector
+def collect_batchers():
+    batchers = [image_batcher.stats(), disease_batcher.stats()]
+    yield ("agrosense_batcher_queue_depth", "gauge", "Items waiting to be batched.",
+           [({"batcher": b["name"]}, b["queue_depth"]) for b in batchers])
+    yield ("agrosense_batcher_batches_total", "counter", "Batches run, by batch size.",
+           [({"batcher": b["name"], "size": size}, count)
+            for b in batchers for size, count in b["batch_size_histogram"].items()])
+
+@collector
+def collect_models():
+    status = registry.status()
+    models = status["models"].items()
+    yield ("agrosense_model_ready", "gauge", "1 when the model is loaded.",
+           [({"model": name}, m["state"] == "ready") for name, m in models])
+    yield ("agrosense_model_load_seconds", "gauge", "Duration of the last load.",
+           [({"model": name}, m["load_ms"] / 1000) for name, m in models if m["load_ms"] is not None])
+    yield ("agrosense_model_memory_bytes", "gauge", "RSS growth while the model loaded.",
+           [({"model": name}, m["rss_delta_mb"] * 2**20) for name, m in models if m["rss_delta_mb"] is not None])
+    yield ("agrosense_model_info", "gauge", "Version being served (always 1).",
+           [({"model": name, "version": m["version"]}, 1) for name, m in models if m["version"] is not None])
+    yield ("agrosense_model_reloads_total", "counter", "New versions swapped in.",
+           [({"model": name}, m["reloads"]) for name, m in models])
+    yield ("agrosense_model_reload_failures_total", "counter", "New versions rejected (load or warm-up failed).",
+           [({"model": name}, m["reload_failures"]) for name, m in models])
+    memory = status["memory"]
+    yield ("agrosense_process_memory_bytes", "gauge", "Worker memory: rss, and unique/shared/pss on Linux.",
+           [({"kind": kind[:-3]}, memory[kind] * 2**20)
+            for kind in ("rss_mb", "unique_mb", "shared_mb", "pss_mb") if kind in memory])
+
+@collector
+def collect_caches():
+    caches = [best_time_cache.stats(), soil_nutrient_cache.stats()]
+    results = result_cache_stats()
+    yield ("agrosense_cache_entries", "gauge", "Entries held in memory.",
+           [({"cache": c["name"]}, c["size"]) for c in caches]
+           + [({"cache": f"{c['name']}_results"}, c["memory_size"]) for c in results])
+    yield ("agrosense_cache_hits_total", "counter", "Cache hits.",
+           [({"cache": c["name"]}, c["hits"]) for c in caches]
+           + [({"cache": f"{c['name']}_results"}, c["memory_hits"] + c["disk_hits"]) for c in results])
+    yield ("agrosense_cache_misses_total", "counter", "Cache misses.",
+           [({"cache": c["name"]}, c["misses"]) for c in caches]
+           + [({"cache": f"{c['name']}_results"}, c["misses"]) for c in results])
+
+@collector
+def collect_logging():
+    stats = logging_stats()
+    yield "agrosense_log_queue_depth", "gauge", "Log records waiting for the writer thread.", [({}, stats["queue_depth"])]
+    yield "agrosense_log_dropped_total", "counter", "Log records dropped on a full queue.", [({}, stats["dropped"])]
+    yield "agrosense_log_sampled_out_total", "counter", "Log records skipped by sampling.", [({}, stats["sampled_out"])]
+
 # ==============================
 # Root endpoint
 # ==============================
@@ -1,28 +1,46 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.schemas import SignupInput, SignupOutput, LoginInput, TokenOutput
-from app.services.auth_service import create_user, authenticate_user, create_access_token
-from app.utils.logger import logger  
+from app.db.database import get_db
+from app.services.auth_service import create_user, authenticate_user, create_access_token, auth_stats
+from app.services.executors import InferenceRejected
+from app.services.token_service import require_user, token_stats
+from app.utils.logger import logger
 
 router = APIRouter(prefix="/api/v1/auth", tags=["Auth"])
 
 @router.post("/signup", response_model=SignupOutput)
-def signup(data: SignupInput):
+async def signup(data: SignupInput, db: AsyncSession = Depends(get_db)):
     logger.info("Signup request received for email=%s", data.email)
     try:
-        create_user(data.email, data.password)
+        await create_user(db, data.email, data.password)
         logger.info("User registered successfully: %s", data.email)
         return {"message": "User registered"}
+    except InferenceRejected:
+        raise
     except Exception as e:
         logger.error("Signup failed for email=%s: %s", data.email, e)
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/login", response_model=TokenOutput)
-def login(data: LoginInput):
+async def login(data: LoginInput, db: AsyncSession = Depends(get_db)):
     logger.info("Login request received for email=%s", data.email)
-    if not authenticate_user(data.email, data.password):
+    if not await authenticate_user(db, data.email, data.password):
         logger.warning("Login failed for email=%s: Invalid credentials", data.email)
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = create_access_token({"sub": data.email})
     logger.info("Login successful for email=%s", data.email)
     return {"access_token": token, "token_type": "bearer"}
+
+
+@router.get("/stats")
+def get_auth_stats():
+    """Login counters, hashing pool queueing and token verification stats."""
+    return {**auth_stats(), "tokens": token_stats()}
+
+
+@router.get("/me")
+async def me(claims: dict = Depends(require_user)):
+    """Claims of the bearer token (verified, usually from the token cache)."""
+    return {"email": claims.get("sub"), "expires": claims.get("exp")}
@@ -1,10 +1,43 @@
-from fastapi import APIRouter
-from models.schemas import GuidelineOutput
-from app.services.guidelines_service import get_guidelines
+import hashlib
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.schemas import DiagnosisOutput, GuidelineOutput
+from app.db.database import get_db
+from app.services.executors import InferenceRejected
+from app.services.guidelines_service import GUIDELINES_MAX_AGE_S, diagnose, get_guidelines, guideline_store
+from app.services.model_registry import ModelUnavailable
+from app.utils.logger import logger
 
 router = APIRouter(prefix="/api/v1/guidelines", tags=["Guidelines"])
 
 @router.get("/recommendations", response_model=GuidelineOutput)
-def get_recs():
-    recs = get_guidelines()
-    return {"recommendations": recs}
\ No newline at end of file
+async def get_recs(request: Request, response: Response, disease: str, crop: Optional[str] = None,
+                   db: AsyncSession = Depends(get_db)):
+    recs = await get_guidelines(db, disease, crop)
+
+    # Version stamp + content hash: changes whenever the answer does
+    digest = hashlib.blake2b("\0".join(recs).encode(), digest_size=8).hexdigest()
+    headers = {"ETag": f'"{guideline_store.version}-{digest}"', "Cache-Control": f"max-age={GUIDELINES_MAX_AGE_S}"}
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return {"recommendations": recs}
+
+@router.post("/diagnose", response_model=DiagnosisOutput)
+async def diagnose_image(file: UploadFile, db: AsyncSession = Depends(get_db)):
+    """Leaf image in, predicted crop/disease and its guidelines out, in one request."""
+    try:
+        return await diagnose(db, await file.read())
+    except (InferenceRejected, HTTPException):
+        raise
+    except ModelUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error("Diagnosis failed for %s: %s", file.filename, e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/stats")
+def get_store_stats():
+    """Guideline store state: loaded version, memory hits vs DB lookups, reloads."""
+    return guideline_store.stats()
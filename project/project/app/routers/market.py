@@ -1,6 +1,7 @@
-from fastapi import APIRouter
-from models.schemas import MarketRequest, MarketOutput
-from app.services.market_service import calc_market
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from models.schemas import MarketBatchOutput, MarketBatchRequest, MarketOutput, MarketRange, MarketRequest
+from app.services.market_service import MARKET_FIELDS, calc_market, calc_market_batch, expand_range, expand_scenarios
 
 router = APIRouter(prefix="/api/v1/market", tags=["Market"])
 
@@ -8,3 +9,23 @@ router = APIRouter(prefix="/api/v1/market", tags=["Market"])
 def calc_profit(data: MarketRequest):
     profit, supply_status = calc_market(**data.dict())
     return {"profit": profit, "supply_status": supply_status}
+
+@router.post("/profit/batch", response_model=MarketBatchOutput)
+def calc_profit_batch(data: MarketBatchRequest):
+    """Profit and supply status for many scenarios at once, returned column-wise.
+
+    Each of supply/demand/cost/price is a number, a list, or an inclusive
+    {start, stop, step} range. mode="zip" pairs lists element-wise;
+    mode="grid" sweeps every combination.
+    """
+    try:
+        inputs = {}
+        for name in MARKET_FIELDS:
+            value = getattr(data, name)
+            inputs[name] = expand_range(value.start, value.stop, value.step) if isinstance(value, MarketRange) else value
+        scenarios = expand_scenarios(inputs, data.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    columns, summary = calc_market_batch(**scenarios)
+    # Plain JSON lists already; skip per-element response validation/encoding
+    return JSONResponse({"columns": columns, "summary": summary})
@@ -1,5 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.services.voice_service import process_voice_input
+import json
+import os
+from fastapi import APIRouter, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.services.voice_service import open_streams, process_voice_input, process_voice_stream
+from app.services.executors import InferenceRejected
+from app.services.audio_decoding import AudioDecodeError, CHUNK_SIZE, audio_io_stats
+from app.services.voice_streaming import stream_stats
 
 router = APIRouter()
 
@@ -7,5 +13,75 @@ router = APIRouter()
 async def voice_input(audio: UploadFile = File(...)):
     try:
         return await process_voice_input(audio)
+    except InferenceRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+async def _upload_chunks(audio: UploadFile):
+    while True:
+        chunk = await audio.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+@router.post("/voice-input/stream")
+async def voice_input_stream(audio: UploadFile = File(...)):
+    """Server-Sent Events: one `partial` event per transcribed window, then `done`."""
+    file_ext = os.path.splitext(audio.filename)[-1].lower()
+    stream = process_voice_stream(_upload_chunks(audio), file_ext)
+    try:
+        # Surface format errors and 429/503 before the 200 response starts
+        first = await stream.__anext__()
+    except InferenceRejected:
+        raise
+    except (ValueError, AudioDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        try:
+            partial = first
+            while True:
+                event = "done" if partial.get("done") else "partial"
+                yield f"event: {event}\ndata: {json.dumps(partial)}\n\n"
+                partial = await stream.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        finally:
+            # Client gone or stream over: release the open-stream slot now, not at GC
+            await stream.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@router.websocket("/ws/voice-input")
+async def voice_input_ws(websocket: WebSocket, format: str = "wav"):
+    """Client sends binary audio chunks, then the text message "end"; partials come back as JSON."""
+    await websocket.accept()
+
+    async def received_chunks():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                yield message["bytes"]
+            elif message.get("text") == "end":
+                return
+
+    try:
+        async for partial in process_voice_stream(received_chunks(), "." + format.lower().lstrip(".")):
+            await websocket.send_json(partial)
+    except WebSocketDisconnect:
+        return
+    except InferenceRejected as e:
+        await websocket.send_json({"error": str(e), "retry_after": e.retry_after})
+    except Exception as e:
+        await websocket.send_json({"error": str(e)})
+    await websocket.close()
+
+@router.get("/io-stats")
+def voice_io_stats():
+    return {**audio_io_stats(), "streaming": {**stream_stats(), "open": open_streams()}}
@@ -0,0 +1,152 @@
+import io
+import os
+import subprocess
+import threading
+import wave
+from math import gcd
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from app.services.metrics import timed
+
+# ==============================
+# In-memory audio decoding
+# ==============================
+# Whisper accepts a float32 mono waveform at 16 kHz instead of a file path.
+# Decoding uploads here avoids a temp-file write + read per request:
+#   - PCM WAV is parsed with the stdlib `wave` module + NumPy (no ffmpeg at all)
+#   - other formats are piped through ffmpeg stdin/stdout (no disk)
+# Anything that fails (e.g. MP4/M4A with the index at the end of the file, which
+# ffmpeg can't read from a pipe) raises AudioDecodeError and the caller falls
+# back to the temp-file path.
+
+SAMPLE_RATE = 16000          # whisper.audio.SAMPLE_RATE
+CHUNK_SIZE = 64 * 1024       # upload read size
+# Uploads are read (and hashed for the result cache) before a speech-pool slot
+# is taken, so their size is capped here instead
+VOICE_UPLOAD_MAX_BYTES = int(float(os.getenv("VOICE_UPLOAD_MAX_MB", "25")) * 2**20)
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+class DecodeStats:
+    """Per-request I/O accounting; totals are kept in `audio_io_totals`."""
+
+    def __init__(self):
+        self.decoder = None
+        self.bytes_read = 0
+        self.bytes_copied = 0
+        self.disk_bytes_avoided = 0
+
+
+_totals_lock = threading.Lock()
+audio_io_totals = {"requests": 0, "bytes_read": 0, "bytes_copied": 0, "disk_bytes_avoided": 0, "decoders": {}}
+
+
+def record(stats: DecodeStats):
+    with _totals_lock:
+        audio_io_totals["requests"] += 1
+        audio_io_totals["bytes_read"] += stats.bytes_read
+        audio_io_totals["bytes_copied"] += stats.bytes_copied
+        audio_io_totals["disk_bytes_avoided"] += stats.disk_bytes_avoided
+        decoders = audio_io_totals["decoders"]
+        decoders[stats.decoder] = decoders.get(stats.decoder, 0) + 1
+
+
+def audio_io_stats():
+    with _totals_lock:
+        return {**audio_io_totals, "decoders": dict(audio_io_totals["decoders"])}
+
+
+async def read_upload(upload, stats: DecodeStats, chunk_size: int = CHUNK_SIZE,
+                      max_bytes: int = VOICE_UPLOAD_MAX_BYTES) -> bytearray:
+    """Read an UploadFile in chunks into one growing buffer, up to `max_bytes`."""
+    buffer = bytearray()
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise ValueError(f"Upload exceeds the {max_bytes / 2**20:g} MB limit")
+    stats.bytes_read = len(buffer)
+    stats.bytes_copied += len(buffer)
+    return buffer
+
+
+def _to_mono_16k(samples: np.ndarray, channels: int, rate: int, stats: DecodeStats) -> np.ndarray:
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+        stats.bytes_copied += samples.nbytes
+    if rate != SAMPLE_RATE:
+        g = gcd(SAMPLE_RATE, rate)
+        samples = resample_poly(samples, SAMPLE_RATE // g, rate // g).astype(np.float32, copy=False)
+        stats.bytes_copied += samples.nbytes
+    return np.ascontiguousarray(samples, dtype=np.float32)
+
+
+def decode_wav(data, stats: DecodeStats) -> np.ndarray:
+    try:
+        with wave.open(io.BytesIO(data)) as wav:
+            channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise AudioDecodeError(f"Unsupported WAV data: {e}")
+    stats.bytes_copied += len(frames)
+
+    if width == 1:    # unsigned 8-bit
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise AudioDecodeError(f"Unsupported WAV sample width: {width}")
+    stats.bytes_copied += samples.nbytes
+    return _to_mono_16k(samples, channels, rate, stats)
+
+
+def decode_with_ffmpeg_pipe(data, stats: DecodeStats) -> np.ndarray:
+    # Same conversion whisper.audio.load_audio does, but stdin/stdout instead of a path
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "pipe:1",
+    ]
+    try:
+        out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg is not installed")
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(f"ffmpeg could not decode from a pipe: {e.stderr.decode(errors='ignore')[-200:]}")
+    if not out:
+        raise AudioDecodeError("ffmpeg produced no audio")
+    stats.bytes_copied += len(data) + len(out)
+    samples = np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768.0
+    stats.bytes_copied += samples.nbytes
+    return samples
+
+
+@timed("audio.decode")
+def decode_audio(data, file_ext: str, stats: DecodeStats):
+    """Decode upload bytes to a float32 16 kHz mono waveform, without touching disk.
+
+    Returns (waveform, stats); stats is returned rather than only mutated so this
+    also works when run on a process pool.
+    """
+    if file_ext == ".wav":
+        try:
+            waveform = decode_wav(data, stats)
+            stats.decoder = "wav"
+        except AudioDecodeError:
+            # e.g. float/compressed WAV: let ffmpeg handle it
+            waveform = decode_with_ffmpeg_pipe(data, stats)
+            stats.decoder = "ffmpeg-pipe"
+    else:
+        waveform = decode_with_ffmpeg_pipe(data, stats)
+        stats.decoder = "ffmpeg-pipe"
+    # A temp file would have been written once and read back once
+    stats.disk_bytes_avoided = 2 * len(data)
+    return waveform, stats
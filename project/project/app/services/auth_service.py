@@ -1,59 +1,139 @@
 import os
-from passlib.context import CryptContext
-from jose import jwt
+import bcrypt
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from app.db.database import SessionLocal, User
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import User, write_lock
+from app.services.executors import get_pool
+from app.services.metrics import span, timed
+from app.services.token_service import sign_token
 from app.utils.logger import logger
 
 # Load .env file
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "default_secret")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# ==============================
+# Password hashing
+# ==============================
+# bcrypt runs on the dedicated "hashing" pool (HASHING_POOL_* settings in
+# app/services/executors.py), never on the event loop or the shared threadpool.
+#
+#   BCRYPT_ROUNDS        cost factor for new hashes; stored hashes with another
+#                        cost are rehashed transparently on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+hashing_pool = get_pool("hashing")
+_counters = {"logins": 0, "failed": 0, "unknown_email": 0, "rehashed": 0}
 
+# Built once: SQLAlchemy reuses the compiled SQL and sqlite keeps the prepared
+# statement in each pooled connection's statement cache
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+def _password_bytes(password: str) -> bytes:
+    # bcrypt only uses the first 72 bytes; bcrypt>=5 raises instead of truncating
+    return password.encode("utf-8")[:72]
+
+@timed("auth.bcrypt_hash")
+def hash_password(password: str, rounds: int = None) -> str:
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds or BCRYPT_ROUNDS)).decode()
+
+@timed("auth.bcrypt_verify")
 def verify_password(plain_password: str, hashed: str) -> bool:
-    return pwd_context.verify(plain_password, hashed)
+    try:
+        return bcrypt.checkpw(_password_bytes(plain_password), hashed.encode())
+    except ValueError:
+        # Malformed or non-bcrypt stored hash
+        return False
 
-def create_user(email: str, password: str):
-    db = SessionLocal()
+# Unknown emails are checked against this, built once so that no login pays an
+# extra hash (and concurrent first logins don't race to build it)
+_dummy_hash = hash_password("agrosense-dummy-password")
+
+def hash_rounds(hashed: str):
+    """Cost factor of a stored "$2b$12$..." hash, or None if it can't be parsed."""
     try:
-        if db.query(User).filter(User.email == email).first():
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+async def _run_hashing(fn, *args):
+    async with hashing_pool.admit():
+        return await hashing_pool.run(fn, *args)
+
+async def _dummy_verify(password: str):
+    # Unknown email: do the same bcrypt work as a real check so response time
+    # doesn't reveal whether the account exists
+    await _run_hashing(verify_password, password, _dummy_hash)
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(USER_BY_EMAIL, {"email": email})
+    return result.scalars().first()
+
+async def create_user(db: AsyncSession, email: str, password: str):
+    try:
+        if await get_user_by_email(db, email):
             logger.warning("Attempt to re-register email: %s", email)
             raise ValueError("Email already registered")
 
-        user = User(email=email, password=hash_password(password))
+        user = User(email=email, password=await _run_hashing(hash_password, password))
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        with span("db.commit"):
+            async with write_lock:
+                await db.commit()
 
         logger.info("Created user id=%s email=%s", user.id, email)
 
     except Exception as e:
+        await db.rollback()
         logger.exception("Error creating user %s: %s", email, e)
         raise
-    finally:
-        db.close()
 
 
-def authenticate_user(email: str, password: str):
-    db = SessionLocal()
+async def _rehash_if_needed(db: AsyncSession, user, password: str):
+    rounds = hash_rounds(user.password)
+    if rounds == BCRYPT_ROUNDS:
+        return
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if not user or not verify_password(password, user.password):
-            return False
-        return True
-    finally:
-        db.close()
+        user.password = await _run_hashing(hash_password, password)
+        with span("db.commit"):
+            async with write_lock:
+                await db.commit()
+        _counters["rehashed"] += 1
+        logger.info("Rehashed password for user id=%s (cost %s -> %s)", user.id, rounds, BCRYPT_ROUNDS)
+    except Exception as e:
+        # The login itself succeeded; try again next time
+        await db.rollback()
+        logger.warning("Rehash failed for user id=%s: %s", user.id, e)
+
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    _counters["logins"] += 1
+    user = await get_user_by_email(db, email)
+    if not user:
+        _counters["unknown_email"] += 1
+        await _dummy_verify(password)
+        return False
+
+    if not await _run_hashing(verify_password, password, user.password):
+        _counters["failed"] += 1
+        return False
+    await _rehash_if_needed(db, user, password)
+    return True
+
+def auth_stats():
+    return {
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+        **_counters,
+        "hashing_pool": hashing_pool.stats(),
+    }
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # Signed with the active key from token_service's keyring (kid header)
+    return sign_token(to_encode)
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+
+from app.services.metrics import observe_stage
+
+# ==============================
+# Async micro-batching
+# ==============================
+# Callers `await batcher.submit(item)`; items are queued and a single worker
+# task groups them into batches of up to `max_batch_size`, waiting at most
+# `max_wait_ms` after the first item arrives. `batch_fn(list_of_items)` must
+# return one result per item, in order; each result is routed back to the
+# caller's future.
+
+
+class _StageTimer:
+    """Running count/total/max for one pipeline stage, in milliseconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch_size: int = 16, max_wait_ms: float = 10.0,
+                 name: str = "batcher", run_batch=None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        # How a batch is executed off the event loop. Defaults to the loop's
+        # default executor; callers may pass an async callable(fn, batch).
+        self._run_batch = run_batch
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self._lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.stages = {"queue_wait": _StageTimer(), "inference": _StageTimer(), "total": _StageTimer()}
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        # Re-bind if we are on a new event loop (e.g. a test client or reload);
+        # on the same loop a stopped worker is restarted over the same queue,
+        # so items already queued are still served
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item):
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _execute(self, items):
+        if self._run_batch is not None:
+            return await self._run_batch(self.batch_fn, items)
+        return await self._loop.run_in_executor(None, self.batch_fn, items)
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            items = [item for item, _, _ in batch]
+            started = time.perf_counter()
+            try:
+                results = await self._execute(items)
+                error = None
+                if len(results) != len(items):
+                    results, error = None, RuntimeError(
+                        f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                results, error = None, e
+            finished = time.perf_counter()
+
+            # Nothing below may end the loop: every future of the batch gets
+            # an outcome, and the worker goes on serving the queue
+            try:
+                with self._lock:
+                    self.batch_sizes[len(batch)] += 1
+                    self.stages["inference"].observe((finished - started) * 1000)
+                    for _, _, enqueued in batch:
+                        self.stages["queue_wait"].observe((started - enqueued) * 1000)
+                        observe_stage(f"batch.{self.name}.queue_wait", started - enqueued)
+                        self.stages["total"].observe((finished - enqueued) * 1000)
+            except Exception:
+                pass
+            for i, (_, future, _) in enumerate(batch):
+                if future.done():  # caller went away
+                    continue
+                try:
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(results[i])
+                except Exception as e:
+                    future.set_exception(e)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": self.queue_depth(),
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+                "latency": {stage: timer.summary() for stage, timer in self.stages.items()},
+            }
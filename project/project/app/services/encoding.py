@@ -0,0 +1,55 @@
+import numpy as np
+
+# ==============================
+# Category encoding helpers
+# ==============================
+# The artifacts store categories as plain lists ({"Crop": [...], "State": [...]}).
+# We turn them into dict indexes once at load time so a lookup is a single hash
+# probe instead of `in` + `.index()` over the list on every request.
+
+def _aliases(value):
+    # Case variants a farmer/frontend might send: "rice", "RICE", "Rice",
+    # "uttar pradesh", "Uttar Pradesh" ...
+    if not isinstance(value, str):
+        return ()
+    return (value.casefold(), value.lower(), value.upper(), value.capitalize(), value.title())
+
+
+def build_category_index(categories):
+    """Build {column: {value: code}} from {column: [values]}, with case aliases."""
+    if categories is None:
+        return None
+    index = {}
+    for column, values in categories.items():
+        codes = {value: code for code, value in enumerate(values)}
+        # Exact values always win; aliases only fill in the gaps
+        for code, value in enumerate(values):
+            for alias in _aliases(value):
+                codes.setdefault(alias, code)
+        index[column] = codes
+    return index
+
+
+def build_decode_table(decoders):
+    """Build {column: array of values} so decoding is a direct array access."""
+    if decoders is None:
+        return None
+    return {column: np.asarray(values, dtype=object) for column, values in decoders.items()}
+
+
+def encode_input(value, column, encoders):
+    codes = encoders[column]
+    code = codes.get(value)
+    if code is None and isinstance(value, str):
+        # Unusual casing ("rICE") falls back to a single casefold lookup
+        code = codes.get(value.casefold())
+    if code is None:
+        raise ValueError(f"Unknown category '{value}' for column '{column}'")
+    return code
+
+
+def decode_output(value, column, decoders):
+    categories = decoders[column]
+    if value < 0 or value >= len(categories):
+        raise ValueError(f"Unknown category code '{value}' for column '{column}'")
+    return categories[value]
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from app.services.metrics import observe_stage
+from app.utils.logger import logger
+
+# ==============================
+# Inference executors
+# ==============================
+# CPU-heavy inference (ResNet50, Whisper) must never run on the event loop, or
+# one transcription stalls every other request in the process. Each domain gets
+# its own bounded pool so vision and speech can't starve each other either.
+# Password hashing (bcrypt) gets one too, so a login burst can't use up the
+# threadpool that sync endpoints run on.
+#
+# Per pool (NAME = VISION / SPEECH / HASHING):
+#   <NAME>_POOL_KIND         thread | process
+#   <NAME>_POOL_WORKERS      number of workers
+#   <NAME>_POOL_MAX_PENDING  requests admitted at once (running + waiting)
+#   <NAME>_POOL_RETRY_AFTER  seconds sent in Retry-After when rejecting
+
+POOL_DEFAULTS = {
+    "vision": {"kind": "thread", "workers": 2, "max_pending": 64, "retry_after": 1},
+    "speech": {"kind": "thread", "workers": 1, "max_pending": 8, "retry_after": 5},
+    # bcrypt releases the GIL, so threads scale with cores
+    "hashing": {"kind": "thread", "workers": 2, "max_pending": 128, "retry_after": 1},
+}
+
+
+class InferenceRejected(Exception):
+    """Raised when a pool can't take more work; mapped to 429/503 in app.main."""
+
+    def __init__(self, pool: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(f"{pool} inference pool {reason}")
+        self.pool = pool
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    def __init__(self, name: str, kind: str = "thread", workers: int = 1,
+                 max_pending: int = 8, retry_after: int = 1):
+        self.name = name
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.retry_after = retry_after
+        if kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{name}-pool")
+        self._closed = False
+        self._lock = threading.Lock()
+        self._loop = None
+        self._slots = None
+        self._started = time.perf_counter()
+        self.in_flight = 0   # admitted requests
+        self.running = 0     # tasks executing on a worker
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0   # time spent waiting for a worker slot
+        self.max_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def admit(self):
+        """Reserve a place for one request, or reject it right away."""
+        with self._lock:
+            if self._closed:
+                self.rejected += 1
+                raise InferenceRejected(self.name, 503, self.retry_after, "is shut down")
+            if self.in_flight >= self.max_pending:
+                self.rejected += 1
+                raise InferenceRejected(self.name, 429, self.retry_after, "is at capacity")
+            self.in_flight += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _worker_slots(self):
+        # One slot per worker so time spent on the executor is pure run time
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on this pool without blocking the event loop."""
+        if self._closed:
+            raise InferenceRejected(self.name, 503, self.retry_after, "is shut down")
+        queued = time.perf_counter()
+        async with self._worker_slots():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self.wait_seconds += started - queued
+                self.max_wait_seconds = max(self.max_wait_seconds, started - queued)
+            observe_stage(f"pool.{self.name}.wait", started - queued)
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.busy_seconds += time.perf_counter() - started
+
+    async def run_batch(self, fn, items):
+        # Signature expected by MicroBatcher(run_batch=...)
+        return await self.run(fn, items)
+
+    def shutdown(self):
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            uptime = time.perf_counter() - self._started
+            return {
+                "name": self.name,
+                "kind": self.kind,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "running": self.running,
+                "waiting": max(0, self.in_flight - self.running),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "utilization": round(self.busy_seconds / (uptime * self.workers), 4) if uptime else 0.0,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _setting(name: str, key: str):
+    default = POOL_DEFAULTS[name][key]
+    value = os.getenv(f"{name.upper()}_POOL_{key.upper()}", str(default))
+    return value if isinstance(default, str) else int(value)
+
+
+def get_pool(name: str) -> InferencePool:
+    """Return the shared pool for a domain ("vision" / "speech" / "hashing"), creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = InferencePool(
+                name,
+                kind=_setting(name, "kind"),
+                workers=_setting(name, "workers"),
+                max_pending=_setting(name, "max_pending"),
+                retry_after=_setting(name, "retry_after"),
+            )
+            logger.info("Started %s inference pool: kind=%s workers=%s max_pending=%s",
+                        name, pool.kind, pool.workers, pool.max_pending)
+            _pools[name] = pool
+        return pool
+
+
+def pool_stats():
+    with _pools_lock:
+        return [pool.stats() for pool in _pools.values()]
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+from math import floor
+
+import httpx
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.services.metrics import span
+from app.services.prediction_cache import PredictionCache
+from app.utils.logger import logger
+
+# ==============================
+# Reverse geocoding (lat/lon -> Indian state)
+# ==============================
+# 1. Quantized LRU cache: nearby fixes (same ~100 m cell) share one entry
+# 2. Local point-in-polygon index over state boundaries from a GeoJSON file,
+#    bucketed on a uniform grid. The bundled app/data/india_states.geojson is
+#    simplified (Natural Earth states as packaged by echarts-countries-js, MIT;
+#    ~1 km accuracy, pre-2019 borders), so points near coasts and borders may
+#    fall through to step 3; download_state_boundaries.py replaces it with
+#    the full-resolution Natural Earth file
+# 3. Optional remote fallback to Nominatim over a pooled async httpx client
+#
+#   STATE_BOUNDARIES_PATH     GeoJSON FeatureCollection, one (Multi)Polygon per state
+#   GEOCODE_GRID_DEG          grid cell size of the spatial index, in degrees
+#   GEOCODE_CACHE_SIZE        number of cached cells
+#   GEOCODE_CACHE_DECIMALS    lat/lon rounding for the cache key (3 ~ 110 m)
+#   GEOCODE_REMOTE_FALLBACK   ask Nominatim when the local index has no answer
+#   GEOCODE_REMOTE_TIMEOUT_S  connect/read timeout of the remote call
+
+STATE_BOUNDARIES_PATH = os.getenv("STATE_BOUNDARIES_PATH", "app/data/india_states.geojson")
+GEOCODE_GRID_DEG = float(os.getenv("GEOCODE_GRID_DEG", "0.5"))
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "100000"))
+GEOCODE_CACHE_DECIMALS = int(os.getenv("GEOCODE_CACHE_DECIMALS", "3"))
+GEOCODE_REMOTE_FALLBACK = os.getenv("GEOCODE_REMOTE_FALLBACK", "true").lower() in ("1", "true", "yes")
+GEOCODE_REMOTE_TIMEOUT_S = float(os.getenv("GEOCODE_REMOTE_TIMEOUT_S", "3"))
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/reverse")
+
+
+# Boundary-file spellings -> the names Nominatim returns and the yield/soil
+# encoders were trained on, so /get-state answers the same whichever step
+# resolved the point (Natural Earth keeps some pre-rename names)
+STATE_ALIASES = {
+    "Pondicherry": "Puducherry",
+    "Orissa": "Odisha",
+    "Uttaranchal": "Uttarakhand",
+    "NCT of Delhi": "Delhi",
+    "Andaman and Nicobar": "Andaman and Nicobar Islands",
+}
+
+
+class GeocodingError(Exception):
+    pass
+
+
+class _Ring:
+    """Edges of one polygon ring, pre-arranged for vectorized ray casting."""
+
+    __slots__ = ("xs", "ys", "yj", "slope")
+
+    def __init__(self, coords):
+        ring = np.asarray(coords, dtype=np.float64)[:, :2]
+        xs, ys = ring[:, 0], ring[:, 1]
+        xj, yj = np.roll(xs, 1), np.roll(ys, 1)
+        dy = yj - ys
+        self.xs, self.ys, self.yj = xs, ys, yj
+        # Horizontal edges never cross the ray; their slope is irrelevant
+        self.slope = np.divide(xj - xs, dy, out=np.zeros_like(dy), where=dy != 0)
+
+    def contains(self, x, y):
+        crosses = (self.ys > y) != (self.yj > y)
+        hits = crosses & (x < self.slope * (y - self.ys) + self.xs)
+        return bool(np.count_nonzero(hits) & 1)
+
+
+class StateIndex:
+    """Uniform-grid spatial index over state polygons."""
+
+    def __init__(self, features, cell_deg: float = GEOCODE_GRID_DEG):
+        self.cell_deg = cell_deg
+        self.parts = []     # (state, (minx, miny, maxx, maxy), exterior, holes)
+        self.grid = {}
+        for feature in features:
+            state = feature.get("properties", {}).get("name")
+            state = STATE_ALIASES.get(state, state)
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            else:
+                continue
+            for rings in polygons:
+                exterior = np.asarray(rings[0], dtype=np.float64)[:, :2]
+                bbox = (*exterior.min(axis=0), *exterior.max(axis=0))
+                self._add(state, bbox, _Ring(rings[0]), [_Ring(hole) for hole in rings[1:]])
+
+    @classmethod
+    def from_geojson(cls, path: str, cell_deg: float = GEOCODE_GRID_DEG):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["features"], cell_deg)
+
+    def _cell(self, x, y):
+        return floor(x / self.cell_deg), floor(y / self.cell_deg)
+
+    def _add(self, state, bbox, exterior, holes):
+        part_id = len(self.parts)
+        self.parts.append((state, bbox, exterior, holes))
+        (i0, j0), (i1, j1) = self._cell(bbox[0], bbox[1]), self._cell(bbox[2], bbox[3])
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self.grid.setdefault((i, j), []).append(part_id)
+
+    def lookup(self, lat: float, lon: float):
+        """Return the state containing (lat, lon), or None."""
+        x, y = lon, lat
+        for part_id in self.grid.get(self._cell(x, y), ()):
+            state, (minx, miny, maxx, maxy), exterior, holes = self.parts[part_id]
+            if not (minx <= x <= maxx and miny <= y <= maxy):
+                continue
+            if exterior.contains(x, y) and not any(hole.contains(x, y) for hole in holes):
+                return state
+        return None
+
+
+# ==============================
+# Module state
+# ==============================
+_index = None
+_index_lock = threading.Lock()
+_index_loaded = False
+state_cache = PredictionCache("geocode", maxsize=GEOCODE_CACHE_SIZE)
+geocode_counts = {"local": 0, "remote": 0, "unresolved": 0}
+_client = None
+
+
+def get_state_index():
+    """Load the boundary index once; None if the GeoJSON isn't available."""
+    global _index, _index_loaded
+    if not _index_loaded:
+        with _index_lock:
+            if not _index_loaded:
+                try:
+                    _index = StateIndex.from_geojson(STATE_BOUNDARIES_PATH)
+                    logger.info("Loaded %d state boundary polygons from %s", len(_index.parts), STATE_BOUNDARIES_PATH)
+                except FileNotFoundError:
+                    logger.error("State boundaries not found at %s (bundled as app/data/india_states.geojson); "
+                                 "every lookup will go to remote geocoding.", STATE_BOUNDARIES_PATH)
+                _index_loaded = True
+    return _index
+
+
+async def load_state_index():
+    """get_state_index() without parsing the GeoJSON on the event loop (called at startup)."""
+    return _index if _index_loaded else await run_in_threadpool(get_state_index)
+
+
+def _get_client():
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GEOCODE_REMOTE_TIMEOUT_S),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            headers={"User-Agent": "agrosense-app"},
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def reverse_geocode_remote(lat: float, lon: float):
+    try:
+        with span("geocode.remote"):
+            response = await _get_client().get(NOMINATIM_URL, params={"lat": lat, "lon": lon, "format": "json"})
+    except httpx.HTTPError as e:
+        raise GeocodingError(f"Failed to fetch location: {e}")
+    if response.status_code != 200:
+        raise GeocodingError("Failed to fetch location")
+    return response.json().get("address", {}).get("state", "Unknown")
+
+
+async def lookup_state(lat: float, lon: float):
+    """Return (state, source) where source is "cache", "local" or "remote"."""
+    key = (round(lat, GEOCODE_CACHE_DECIMALS), round(lon, GEOCODE_CACHE_DECIMALS))
+    state = state_cache.get(key)
+    if state is not None:
+        return state, "cache"
+
+    index = await load_state_index()
+    with span("geocode.local"):
+        state = index.lookup(lat, lon) if index is not None else None
+    if state is not None:
+        geocode_counts["local"] += 1
+        state_cache.put(key, state)
+        return state, "local"
+
+    if GEOCODE_REMOTE_FALLBACK:
+        state = await reverse_geocode_remote(lat, lon)
+        geocode_counts["remote"] += 1
+        # "Unknown" may be a transient gap in Nominatim's answer; ask again next time
+        if state != "Unknown":
+            state_cache.put(key, state)
+        return state, "remote"
+
+    geocode_counts["unresolved"] += 1
+    return "Unknown", "local"
+
+
+def geocode_stats():
+    index = get_state_index()
+    return {
+        "index_loaded": index is not None,
+        "polygons": len(index.parts) if index is not None else 0,
+        "grid_cells": len(index.grid) if index is not None else 0,
+        "remote_fallback": GEOCODE_REMOTE_FALLBACK,
+        "lookups": dict(geocode_counts),
+        "cache": state_cache.stats(),
+    }
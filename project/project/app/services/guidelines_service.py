@@ -1,29 +1,121 @@
+import os
+import time
+from collections import defaultdict
+from typing import Optional
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.logger import logger
-from app.db.database import SessionLocal, Guidelines
+from app.db.database import Guidelines, GuidelinesVersion
 from app.services.ml_model import predict_disease
 
-# services/ml_model.py
+# ==============================
+# Guideline store
+# ==============================
+# The guidelines table is small and read-mostly, so the whole table is loaded
+# into a (crop, disease) -> instructions map at startup and requests never touch
+# the DB. Triggers bump guidelines_version on every change; the store compares
+# it at most every GUIDELINES_CHECK_S and reloads when it moved.
+#
+#   GUIDELINES_PRELOAD=false  skip the map and query the DB per request
+#                             (served by the composite crop/disease index)
+#   GUIDELINES_MAX_AGE_S      Cache-Control max-age on the recommendations endpoint
 
-def predict_disease(image_path: str) -> str:
-    # Return a fake disease for testing
-    return "Leaf Blight"
+GUIDELINES_PRELOAD = os.getenv("GUIDELINES_PRELOAD", "true").lower() in ("1", "true", "yes")
+GUIDELINES_CHECK_S = float(os.getenv("GUIDELINES_CHECK_S", "5"))
+GUIDELINES_MAX_AGE_S = int(os.getenv("GUIDELINES_MAX_AGE_S", "300"))
 
-def get_guidelines(crop_image_path: str):
-    try:
-        # 1. Run ML model on image
-        disease = predict_disease(crop_image_path)
-        logger.info("Predicted disease from image %s: %s", crop_image_path, disease)
+# Compiled once and reused for every request
+CURRENT_VERSION = select(GuidelinesVersion.version).where(GuidelinesVersion.id == 1)
+ALL_GUIDELINES = select(Guidelines.crop_name, Guidelines.disease_name, Guidelines.instructions).order_by(Guidelines.id)
+INSTRUCTIONS_BY_CROP_DISEASE = (
+    select(Guidelines.instructions)
+    .where(Guidelines.crop_name == bindparam("crop"), Guidelines.disease_name == bindparam("disease"))
+    .order_by(Guidelines.id)
+)
+INSTRUCTIONS_BY_DISEASE = (
+    select(Guidelines.instructions).where(Guidelines.disease_name == bindparam("disease")).order_by(Guidelines.id)
+)
+
+
+class GuidelineStore:
+    def __init__(self, preload: bool = True, check_interval: float = 5.0):
+        self.preload = preload
+        self.check_interval = check_interval
+        self.version = None
+        self.loaded = False
+        self._by_crop_disease = {}
+        self._by_disease = {}
+        self._next_check = 0.0
+        self.stats_counters = {"memory_hits": 0, "db_lookups": 0, "reloads": 0}
+
+    async def _current_version(self, db: AsyncSession):
+        return (await db.execute(CURRENT_VERSION)).scalar() or 0
+
+    async def load(self, db: AsyncSession):
+        """(Re)load the whole table into memory."""
+        version = await self._current_version(db)
+        by_crop_disease, by_disease = defaultdict(list), defaultdict(list)
+        for crop, disease, instructions in (await db.execute(ALL_GUIDELINES)).all():
+            by_crop_disease[(crop, disease)].append(instructions)
+            by_disease[disease].append(instructions)
+        # Swap whole maps so concurrent readers see either the old or new set
+        self._by_crop_disease, self._by_disease = dict(by_crop_disease), dict(by_disease)
+        self.version, self.loaded = version, True
+        self.stats_counters["reloads"] += 1
+        logger.info("Loaded %d guideline groups (version %s)", len(self._by_crop_disease), version)
+
+    async def refresh(self, db: AsyncSession):
+        """Reload if the table changed since the last load (checked every check_interval)."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        version = await self._current_version(db)
+        if self.preload and (not self.loaded or version != self.version):
+            await self.load(db)
+        self.version = version
+
+    async def lookup(self, db: AsyncSession, disease: str, crop: Optional[str] = None):
+        await self.refresh(db)
+        if self.loaded:
+            self.stats_counters["memory_hits"] += 1
+            source = self._by_disease if crop is None else self._by_crop_disease
+            return list(source.get(disease if crop is None else (crop, disease), ()))
 
-        # 2. Fetch relevant guidelines from DB
-        db = SessionLocal()
-        rows = db.query(Guidelines).filter(Guidelines.disease == disease).all()
-        logger.info("Fetched %d guidelines for disease=%s", len(rows), disease)
+        self.stats_counters["db_lookups"] += 1
+        if crop is None:
+            result = await db.execute(INSTRUCTIONS_BY_DISEASE, {"disease": disease})
+        else:
+            result = await db.execute(INSTRUCTIONS_BY_CROP_DISEASE, {"crop": crop, "disease": disease})
+        return list(result.scalars().all())
 
-        return [row.text for row in rows]
+    def stats(self):
+        return {
+            "preload": self.preload,
+            "loaded": self.loaded,
+            "version": self.version,
+            "groups": len(self._by_crop_disease),
+            **self.stats_counters,
+        }
+
+
+guideline_store = GuidelineStore(GUIDELINES_PRELOAD, GUIDELINES_CHECK_S)
+
+
+async def get_guidelines(db: AsyncSession, disease: str, crop: str = None):
+    try:
+        recs = await guideline_store.lookup(db, disease, crop)
+        logger.info("Fetched %d guidelines for crop=%s disease=%s", len(recs), crop, disease)
+        return recs
 
     except Exception as e:
-        logger.exception("Error fetching guidelines for image %s: %s", crop_image_path, e)
+        logger.exception("Error fetching guidelines for crop=%s disease=%s: %s", crop, disease, e)
         raise
 
-    finally:
-        db.close()
+
+async def diagnose(db: AsyncSession, image_bytes: bytes):
+    """Classify a leaf image and attach the guidelines for the predicted (crop, disease)."""
+    prediction = await predict_disease(image_bytes)
+    logger.info("Predicted %s (%.3f)", prediction["label"], prediction["confidence"])
+    recs = await get_guidelines(db, prediction["disease"], prediction["crop"])
+    return {**prediction, "recommendations": recs}
@@ -0,0 +1,91 @@
+import io
+import math
+import threading
+
+import numpy as np
+from PIL import Image
+
+from app.services.metrics import span, timed
+
+# ==============================
+# Image preprocessing
+# ==============================
+# Equivalent of Resize(256) -> CenterCrop(224) -> ToTensor -> Normalize, without
+# the waste of decoding 12 MP phone photos at full size:
+#
+# - JPEGs are decoded in draft mode: libjpeg scales by 1/2, 1/4 or 1/8 while
+#   decoding, landing just above 256 px instead of at 4000 px.
+# - Each request keeps only its 224x224 uint8 crop (150 KB).
+# - At batch time the crops are normalized straight into a preallocated float
+#   buffer (per worker thread, pinned when CUDA is present), so no per-image
+#   float tensors or torch.stack copies are made.
+
+RESIZE_TO = 256
+CROP = 224
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+@timed("image.decode")
+def decode_image(image_bytes: bytes) -> np.ndarray:
+    """Decode, resize (shorter side 256) and center-crop to a (224, 224, 3) uint8 array."""
+    img = Image.open(io.BytesIO(image_bytes))
+    width, height = img.size
+    scale = RESIZE_TO / min(width, height)
+    size = (max(RESIZE_TO, round(width * scale)), max(RESIZE_TO, round(height * scale)))
+    if img.format == "JPEG":
+        # Reduced decode to the smallest DCT scale that is still >= size
+        img.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+    img = img.convert("RGB")
+    if img.size != size:
+        # reducing_gap: cheap integer downscale first for sources that weren't drafted
+        img = img.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    left, top = (size[0] - CROP) // 2, (size[1] - CROP) // 2
+    img = img.crop((left, top, left + CROP, top + CROP))
+    return np.asarray(img)
+
+
+class BatchBuffers:
+    """Preallocated, reused (N, 3, 224, 224) float batch tensors, one per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._constants = None
+
+    def _normalize_constants(self):
+        # (x / 255 - mean) / std  ==  x * scale + bias
+        if self._constants is None:
+            import torch
+            scale = torch.from_numpy(1.0 / (255.0 * STD)).view(1, 3, 1, 1)
+            bias = torch.from_numpy(-MEAN / STD).view(1, 3, 1, 1)
+            self._constants = (scale, bias)
+        return self._constants
+
+    def _buffers(self, n):
+        import torch
+        local = self._local
+        if getattr(local, "capacity", 0) < n:
+            pin = torch.cuda.is_available()
+            local.pixels = np.empty((n, CROP, CROP, 3), dtype=np.uint8)
+            local.batch = torch.empty((n, 3, CROP, CROP), dtype=torch.float32, pin_memory=pin)
+            local.capacity = n
+        return local.pixels, local.batch
+
+    def to_tensor(self, images):
+        """Normalized batch tensor for a list of decode_image() arrays.
+
+        The tensor is a view of this thread's buffer: use it before the next
+        call on the same thread.
+        """
+        import torch
+        n = len(images)
+        with span("image.to_tensor"):
+            pixels, batch = self._buffers(n)
+            np.stack(images, out=pixels[:n])
+            scale, bias = self._normalize_constants()
+            out = batch[:n]
+            torch.mul(torch.from_numpy(pixels[:n]).permute(0, 3, 1, 2), scale, out=out)
+            return out.add_(bias)
+
+
+batch_buffers = BatchBuffers()
@@ -1,37 +1,97 @@
-import torch
-from torchvision import models, transforms
+import os
 from fastapi import UploadFile
-from PIL import Image
-import io
+from app.services.batching import MicroBatcher
+from app.services.executors import InferenceRejected, get_pool
+from app.services.image_preprocess import batch_buffers, decode_image
+from app.services.metrics import span
+from app.services.model_registry import MODEL_MMAP, file_version, load_torch_checkpoint, registry
+from app.services.result_cache import ResultCache
 
-# Load pre-trained model
-model = models.resnet50(weights=models.ResNet50_Weights.DEFAULT)
-model.eval()
+# torch/torchvision are imported on first use too: they cost seconds and
+# hundreds of MB that auth/market-only workers never need.
+
+# Pre-trained model, loaded on first use (see app/services/model_registry.py)
+def load_resnet50():
+    from torchvision import models
+    if not MODEL_MMAP:
+        model = models.resnet50(weights=models.ResNet50_Weights.DEFAULT)
+        model.eval()
+        return model
+
+    # Map the checkpoint file and use its tensors as the parameters directly
+    # (assign=True), so workers share the weights through the page cache
+    model = models.resnet50(weights=None)
+    model.load_state_dict(load_torch_checkpoint(resnet50_checkpoint_path()), assign=True)
+    model.eval()
+    return model
+
+def resnet50_checkpoint_path():
+    # RESNET50_WEIGHTS_PATH, or torchvision's own cached download
+    path = os.getenv("RESNET50_WEIGHTS_PATH")
+    if path:
+        return path
+    import torch
+    from torchvision import models
+    url = models.ResNet50_Weights.DEFAULT.url
+    path = os.path.join(torch.hub.get_dir(), "checkpoints", os.path.basename(url))
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        torch.hub.download_url_to_file(url, path)
+    return path
+
+registry.register("resnet50", load_resnet50)
+
+def resnet50_version():
+    path = os.getenv("RESNET50_WEIGHTS_PATH")
+    return "resnet50:" + (file_version(path) if path else "imagenet-default")
+
+# Retried uploads of the same photo reuse the earlier result (app/services/result_cache.py)
+image_result_cache = ResultCache("image")
 
 # Load ImageNet classes
 with open("app/services/imagenet_classes.txt") as f:
     imagenet_classes = [line.strip() for line in f.readlines()]
 
+def classify_batch(images):
+    import torch
+    # One forward pass for every image queued in this batch
+    model = registry.get("resnet50")
+    with torch.no_grad():
+        batch = batch_buffers.to_tensor(images)
+        with span("resnet50.forward"):
+            outputs = model(batch)
+        predicted_idx = outputs.argmax(1).tolist()
+    return [imagenet_classes[i] for i in predicted_idx]
+
+# Decoding and forward passes run on the shared vision pool (app/services/executors.py)
+vision_pool = get_pool("vision")
+
+# Concurrent uploads are grouped into batches (see app/services/batching.py)
+image_batcher = MicroBatcher(
+    classify_batch,
+    max_batch_size=int(os.getenv("IMAGE_BATCH_MAX_SIZE", "16")),
+    max_wait_ms=float(os.getenv("IMAGE_BATCH_MAX_WAIT_MS", "10")),
+    name="resnet50",
+    run_batch=vision_pool.run_batch,
+)
+
 async def process_image(file: UploadFile):
     try:
         image_bytes = await file.read()
-        img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-
-        preprocess = transforms.Compose([
-            transforms.Resize(256),
-            transforms.CenterCrop(224),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                                 std=[0.229, 0.224, 0.225])
-        ])
-        input_tensor = preprocess(img).unsqueeze(0)
+        cache_key = await image_result_cache.key(image_bytes, resnet50_version())
+        cached = await image_result_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-        with torch.no_grad():
-            outputs = model(input_tensor)
-            _, predicted_idx = outputs.max(1)
-            class_name = imagenet_classes[predicted_idx.item()]
+        async with vision_pool.admit():
+            pixels = await vision_pool.run(decode_image, image_bytes)
+            class_name = await image_batcher.submit(pixels)
 
-        return {"class_name": class_name}
+        result = {"class_name": class_name}
+        await image_result_cache.put(cache_key, result)
+        return result
 
+    except InferenceRejected:
+        raise
     except Exception as e:
         return {"error": str(e)}
@@ -1,3 +1,8 @@
+import os
+import time
+
+import numpy as np
+
 from app.utils.logger import logger
 def calc_market(supply: float, demand: float, cost: float, price: float):
     try:
@@ -15,3 +20,102 @@ def calc_market(supply: float, demand: float, cost: float, price: float):
     except Exception as e:
         logger.exception("Market calculation failed: %s", e)
         raise
+
+
+# ==============================
+# Batch / scenario sweeps
+# ==============================
+# Same formula as calc_market, applied column-wise with NumPy. Each input is a
+# scalar, a list or an inclusive {start, stop, step} range:
+#
+#   mode="zip"   lists are paired element-wise (scalars broadcast)
+#   mode="grid"  every combination of the four inputs (Cartesian product)
+#
+# One aggregate log record per batch instead of one per row.
+
+MARKET_BATCH_MAX_ROWS = int(os.getenv("MARKET_BATCH_MAX_ROWS", "1000000"))
+MARKET_FIELDS = ("supply", "demand", "cost", "price")
+
+
+def expand_range(start: float, stop: float, step: float) -> np.ndarray:
+    """start, start + step, ... up to and including stop (within float error)."""
+    if step <= 0:
+        raise ValueError("range step must be positive")
+    if stop < start:
+        raise ValueError("range stop must be >= start")
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    if count > MARKET_BATCH_MAX_ROWS:
+        raise ValueError(f"range has {count} values; the limit is {MARKET_BATCH_MAX_ROWS}")
+    return start + step * np.arange(count, dtype=float)
+
+
+def expand_scenarios(inputs: dict, mode: str = "zip"):
+    """Turn scalar/list/array inputs into four equal-length float columns."""
+    columns = {name: np.atleast_1d(np.asarray(inputs[name], dtype=float)) for name in MARKET_FIELDS}
+    empty = [name for name, c in columns.items() if len(c) == 0]
+    if empty:
+        raise ValueError(f"empty input: {', '.join(empty)}")
+    if mode == "grid":
+        rows = int(np.prod([len(c) for c in columns.values()], dtype=np.int64))
+        if rows > MARKET_BATCH_MAX_ROWS:
+            raise ValueError(f"grid has {rows} scenarios; the limit is {MARKET_BATCH_MAX_ROWS}")
+        grids = np.meshgrid(*columns.values(), indexing="ij")
+        return {name: grid.ravel() for name, grid in zip(MARKET_FIELDS, grids)}
+    if mode != "zip":
+        raise ValueError("mode must be 'zip' or 'grid'")
+    lengths = {len(c) for c in columns.values() if len(c) != 1}
+    if len(lengths) > 1:
+        raise ValueError(f"zip mode needs lists of equal length, got lengths {sorted(lengths)}")
+    rows = lengths.pop() if lengths else 1
+    if rows > MARKET_BATCH_MAX_ROWS:
+        raise ValueError(f"batch has {rows} rows; the limit is {MARKET_BATCH_MAX_ROWS}")
+    return {name: np.broadcast_to(c, rows) for name, c in columns.items()}
+
+
+def calc_market_batch(supply, demand, cost, price):
+    """Vectorized calc_market: per-row profit/status columns plus summary aggregates."""
+    started = time.perf_counter()
+    volume = np.minimum(supply, demand)
+    profit = (price - cost) * volume
+    supply_status = np.where(supply > demand, "excess", np.where(supply < demand, "shortage", "balanced"))
+
+    best = int(np.argmax(profit))
+    total_volume = float(volume.sum())
+    summary = {
+        "rows": len(profit),
+        "total_profit": float(profit.sum()),
+        "mean_profit": float(profit.mean()),
+        "min_profit": float(profit.min()),
+        "max_profit": float(profit[best]),
+        # Scenario with the highest profit (first one on ties)
+        "max_profit_point": {
+            "index": best,
+            "supply": float(supply[best]),
+            "demand": float(demand[best]),
+            "cost": float(cost[best]),
+            "price": float(price[best]),
+        },
+        # Single price at which the whole set's total profit is zero:
+        # sum((p - cost) * volume) = 0  =>  p = sum(cost * volume) / sum(volume)
+        "break_even_price": float((cost * volume).sum() / total_volume) if total_volume > 0 else None,
+        "profitable": int((profit > 0).sum()),
+        "loss_making": int((profit < 0).sum()),
+        "status_counts": {
+            status: int((supply_status == status).sum()) for status in ("excess", "shortage", "balanced")
+        },
+    }
+    logger.info(
+        "Market batch calculation: rows=%d, total_profit=%.2f, max_profit=%.2f at row %d, "
+        "break_even_price=%s, status_counts=%s (%.1f ms)",
+        summary["rows"], summary["total_profit"], summary["max_profit"], best,
+        summary["break_even_price"], summary["status_counts"], (time.perf_counter() - started) * 1000,
+    )
+    columns = {
+        "supply": supply.tolist(),
+        "demand": demand.tolist(),
+        "cost": cost.tolist(),
+        "price": price.tolist(),
+        "profit": profit.tolist(),
+        "supply_status": supply_status.tolist(),
+    }
+    return columns, summary
@@ -0,0 +1,220 @@
+import bisect
+import functools
+import inspect
+import math
+import os
+import threading
+import time
+
+# ==============================
+# Metrics
+# ==============================
+# Prometheus text-format metrics for GET /metrics, without a client library.
+#
+#   agrosense_http_request_duration_seconds{method, route, status}
+#       every request, labelled with the route template (not the raw path)
+#   agrosense_stage_duration_seconds{stage}
+#       internal steps, recorded with `with span("yield.predict"):` or
+#       @timed("image.decode"); stages are named "<area>.<step>"
+#   gauges/counters read at scrape time from collectors registered with
+#   @collector (inference pools, batchers, model memory, caches, logging)
+#
+# Values are per worker process, like the other stats endpoints: scrape each
+# worker, or sum across them. Recording a value is two perf_counter() calls, a
+# bisect and a short lock (about 1 us); METRICS_ENABLED=false turns spans and
+# request timing into no-ops.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_histograms = []
+_collectors = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _value(v) -> str:
+    if v is None:
+        return "NaN"
+    if isinstance(v, float) and math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if isinstance(v, float) else str(int(v))
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames, buckets):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+        _histograms.append(self)
+
+    def observe(self, value: float, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def expose(self):
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == math.inf else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+request_seconds = Histogram(
+    "agrosense_http_request_duration_seconds", "HTTP request latency by route template and status.",
+    ("method", "route", "status"), REQUEST_BUCKETS,
+)
+stage_seconds = Histogram(
+    "agrosense_stage_duration_seconds", "Latency of internal stages (encode, predict, decode, forward, ...).",
+    ("stage",), STAGE_BUCKETS,
+)
+
+
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stage_seconds.observe(time.perf_counter() - self.started, self.stage)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_no_span = _NoSpan()
+
+
+def span(stage: str):
+    """Context manager recording the duration of its block under `stage`."""
+    return _Span(stage) if METRICS_ENABLED else _no_span
+
+
+def observe_stage(stage: str, seconds: float):
+    if METRICS_ENABLED:
+        stage_seconds.observe(seconds, stage)
+
+
+def timed(stage: str):
+    """Decorator recording each call's duration under `stage` (sync or async functions)."""
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    stage_seconds.observe(time.perf_counter() - started, stage)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stage_seconds.observe(time.perf_counter() - started, stage)
+        return wrapper
+    return decorate
+
+
+def collector(fn):
+    """Register fn() -> iterable of (name, type, help, [(labels dict, value), ...]), read on every scrape."""
+    _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    lines = []
+    for histogram in _histograms:
+        lines.extend(histogram.expose())
+    for fn in _collectors:
+        for name, kind, help, samples in fn():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request (plain ASGI, so streaming responses are unaffected)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = {}
+
+    def _route(self, scope) -> str:
+        # The router stores the matched endpoint in the scope; map it back to its path template
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            app = scope.get("app")
+            for r in getattr(app, "routes", ()):
+                self._routes.setdefault(getattr(r, "endpoint", None), r.path)
+            route = self._routes.get(endpoint, getattr(endpoint, "__name__", "unknown"))
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_seconds.observe(time.perf_counter() - started, scope["method"], self._route(scope), str(status))
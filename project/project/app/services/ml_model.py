@@ -1,3 +1,82 @@
-def predict_disease(image_path: str) -> str:
-    # Temporary dummy function until ML team integrates their model
-    return "Leaf Blight"
+import os
+from app.services.batching import MicroBatcher
+from app.services.image_preprocess import batch_buffers, decode_image
+from app.services.image_service import vision_pool
+from app.services.metrics import span
+from app.services.model_registry import file_version, registry
+from app.services.result_cache import ResultCache
+
+# ==============================
+# Crop disease classifier
+# ==============================
+# A MobileNetV3 backbone with a PlantVillage-style head ("Crop___Disease"
+# labels, app/services/disease_classes.txt), exported by export_disease_model.py
+# to TorchScript with int8 dynamic quantization. The TorchScript file carries
+# its own architecture, so loading it needs no torchvision model code.
+#
+#   DISEASE_MODEL_PATH   exported TorchScript model
+#   DISEASE_LABELS_PATH  one label per line, in the head's output order
+
+DISEASE_MODEL_PATH = os.getenv("DISEASE_MODEL_PATH", "models/disease_mobilenet_v3_int8.pt")
+DISEASE_LABELS_PATH = os.getenv("DISEASE_LABELS_PATH", "app/services/disease_classes.txt")
+
+with open(DISEASE_LABELS_PATH) as f:
+    disease_classes = [line.strip() for line in f if line.strip()]
+
+
+def split_label(label: str):
+    """"Tomato___Late_blight" -> ("Tomato", "Late blight"), matching guideline crop/disease names."""
+    crop, _, disease = label.partition("___")
+    return crop.replace("_", " ").strip(), disease.replace("_", " ").strip()
+
+
+def load_disease_model():
+    import torch
+    model = torch.jit.load(DISEASE_MODEL_PATH, map_location="cpu")
+    model.eval()
+    return model
+
+# Replacing the TorchScript file hot-reloads it (MODEL_HOT_RELOAD in model_registry.py)
+registry.register("disease", load_disease_model, path=DISEASE_MODEL_PATH)
+disease_result_cache = ResultCache("disease")
+
+
+def classify_disease_batch(images):
+    import torch
+    # One forward pass for every image queued in this batch
+    model = registry.get("disease")
+    with torch.no_grad():
+        batch = batch_buffers.to_tensor(images)
+        with span("disease.forward"):
+            logits = model(batch)
+        probs = torch.softmax(logits, dim=1)
+        confidence, predicted_idx = probs.max(1)
+    results = []
+    for idx, conf in zip(predicted_idx.tolist(), confidence.tolist()):
+        crop, disease = split_label(disease_classes[idx])
+        results.append({"label": disease_classes[idx], "crop": crop, "disease": disease, "confidence": round(conf, 4)})
+    return results
+
+# Shares the vision pool with ResNet50 so image work stays bounded as a whole
+disease_batcher = MicroBatcher(
+    classify_disease_batch,
+    max_batch_size=int(os.getenv("DISEASE_BATCH_MAX_SIZE", "16")),
+    max_wait_ms=float(os.getenv("DISEASE_BATCH_MAX_WAIT_MS", "10")),
+    name="disease",
+    run_batch=vision_pool.run_batch,
+)
+
+
+async def predict_disease(image_bytes: bytes) -> dict:
+    """Classify one leaf image: {"label", "crop", "disease", "confidence"}."""
+    version = registry.served_version("disease") or file_version(DISEASE_MODEL_PATH)
+    cache_key = await disease_result_cache.key(image_bytes, version)
+    cached = await disease_result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    async with vision_pool.admit():
+        pixels = await vision_pool.run(decode_image, image_bytes)
+        result = await disease_batcher.submit(pixels)
+    await disease_result_cache.put(cache_key, result)
+    return result
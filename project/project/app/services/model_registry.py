@@ -0,0 +1,311 @@
+import os
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.logger import logger
+
+# ==============================
+# Model registry
+# ==============================
+# Every model (tabular artifacts, ResNet50, Whisper) is registered with a loader
+# instead of being loaded at import time. A worker that only serves auth or
+# market traffic never pays for weights it doesn't use.
+#
+#   MODEL_LOADING=lazy   (default) load each model on first use
+#   MODEL_LOADING=eager  load all registered models in parallel in the
+#                        background at startup; requests that need a model
+#                        still block until that one is ready
+#
+#   MODEL_MMAP=true      memory-map the sklearn artifact arrays and the fp32
+#                        ResNet50 weights instead of copying them into each
+#                        process. Pages come from the OS page cache, so N
+#                        workers on one host share one copy. Whisper is not
+#                        mapped: its checkpoints are fp16 and are converted to
+#                        fp32 on load. Combine with gunicorn preload
+#                        (gunicorn.conf.py) so objects that can't be mapped,
+#                        Whisper included, are shared copy-on-write.
+#
+#   MODEL_HOT_RELOAD=true   (default) models registered with an artifact path
+#                           are reloaded when the file changes (checked on use,
+#                           at most every MODEL_RELOAD_CHECK_S seconds). The new
+#                           version loads in a background thread and must pass
+#                           its warm-up prediction; then it is swapped in, and
+#                           requests already holding the old version finish on
+#                           it. Replace artifacts atomically (write elsewhere,
+#                           then mv); a half-written file just fails the reload
+#                           and the old version keeps serving.
+#
+#   MODEL_RETRY_S=30     a model without an artifact path (ResNet50, Whisper:
+#                        weights are downloaded) that failed to load is tried
+#                        again on use once this many seconds have passed, so a
+#                        transient download error doesn't last until restart
+
+MODEL_LOADING = os.getenv("MODEL_LOADING", "lazy").lower()
+MODEL_MMAP = os.getenv("MODEL_MMAP", "false").lower() in ("1", "true", "yes")
+MODEL_HOT_RELOAD = os.getenv("MODEL_HOT_RELOAD", "true").lower() in ("1", "true", "yes")
+MODEL_RELOAD_CHECK_S = float(os.getenv("MODEL_RELOAD_CHECK_S", "5"))
+MODEL_RETRY_S = float(os.getenv("MODEL_RETRY_S", "30"))
+
+NOT_LOADED, LOADING, READY, FAILED = "not_loaded", "loading", "ready", "failed"
+
+
+class ModelUnavailable(RuntimeError):
+    pass
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process, in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # No /proc (macOS/Windows): fall back to peak RSS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def memory_report():
+    """RSS split into memory unique to this worker and memory shared with others (Linux)."""
+    report = {"pid": os.getpid(), "rss_mb": round(rss_mb(), 1)}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024   # kB -> MB
+    except OSError:
+        return report
+    report["unique_mb"] = round(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0), 1)
+    report["shared_mb"] = round(fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0), 1)
+    report["pss_mb"] = round(fields.get("Pss", 0), 1)
+    return report
+
+
+def file_version(path: str) -> str:
+    """Model version from a weights file: name plus mtime, so replacing the file gives a new version."""
+    try:
+        return f"{os.path.basename(path)}@{os.stat(path).st_mtime_ns}"
+    except OSError:
+        return os.path.basename(path)
+
+
+def load_joblib_artifact(path):
+    """joblib.load, memory-mapping the stored numpy arrays when MODEL_MMAP is on.
+
+    Only uncompressed dumps can be mapped. Estimators that copy arrays into their
+    own buffers on unpickle (e.g. sklearn trees) are instead shared by loading
+    before fork.
+    """
+    import joblib
+    return joblib.load(path, mmap_mode="r" if MODEL_MMAP else None)
+
+
+def load_torch_checkpoint(path):
+    """torch.load on CPU, memory-mapped when MODEL_MMAP is on."""
+    import torch
+    return torch.load(path, map_location="cpu", mmap=MODEL_MMAP, weights_only=True)
+
+
+class ModelVersion:
+    """One loaded version of a model. Reloads replace it as a whole, never in place."""
+
+    __slots__ = ("value", "version", "generation", "loaded_at", "load_ms", "warmup_ms", "rss_delta_mb")
+
+    def __init__(self, value, version, generation):
+        self.value = value
+        self.version = version
+        self.generation = generation
+        self.loaded_at = time.time()
+        self.load_ms = None
+        self.warmup_ms = None
+        self.rss_delta_mb = None
+
+
+class ModelEntry:
+    def __init__(self, name, loader, on_load=None, path=None, warmup=None):
+        self.name = name
+        self.loader = loader
+        self.on_load = on_load
+        self.path = path
+        self.warmup = warmup
+        self.current = None         # ModelVersion being served
+        self.state = NOT_LOADED
+        self.error = None
+        self.generation = 0
+        self.reloading = False
+        self.reloads = 0
+        self.reload_failures = 0
+        self.failed_version = None  # artifact version that failed; not retried until it changes
+        self.failed_at = None       # monotonic time of the last failed load
+        self.next_check = 0.0
+        self.lock = threading.Lock()
+
+    def source_version(self):
+        return file_version(self.path) if self.path else None
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._entries = {}
+        self._reload_lock = threading.Lock()
+
+    def register(self, name, loader, on_load=None, path=None, warmup=None):
+        """Register `loader()`.
+
+        path     artifact file; its version is reported and, with
+                 MODEL_HOT_RELOAD, changes to it are loaded in the background
+        warmup   warmup(value) runs a test prediction; raising rejects the version
+        on_load  on_load(model_version) runs after every (re)load, before the
+                 new version is served
+        """
+        self._entries[name] = ModelEntry(name, loader, on_load, path, warmup)
+
+    def get(self, name):
+        """Return the loaded model, loading it on first use."""
+        return self.get_version(name).value
+
+    def get_version(self, name) -> ModelVersion:
+        """The ModelVersion being served. Keep using the returned object for the
+        whole request: a reload swaps in a new one without touching it."""
+        entry = self._entries[name]
+        current = entry.current
+        if current is None:
+            self._load(entry)
+            current = entry.current
+            if current is None:
+                raise ModelUnavailable(f"{name} model not loaded: {entry.error}")
+        elif entry.path and MODEL_HOT_RELOAD:
+            self._check_for_update(entry, current)
+        return current
+
+    def served_version(self, name):
+        """Version currently served, without loading anything (None before the first load)."""
+        current = self._entries[name].current
+        return current.version if current else None
+
+    def _check_for_update(self, entry, current):
+        now = time.monotonic()
+        if now < entry.next_check:
+            return
+        entry.next_check = now + MODEL_RELOAD_CHECK_S
+        version = entry.source_version()
+        if version in (current.version, entry.failed_version):
+            return
+        with self._reload_lock:
+            if entry.reloading:
+                return
+            entry.reloading = True
+
+        def run():
+            try:
+                self._load(entry, force=True)
+            finally:
+                entry.reloading = False
+
+        # Requests keep being served by `current` while the new version loads
+        threading.Thread(target=run, name=f"model-reload-{entry.name}", daemon=True).start()
+
+    def _load(self, entry, force=False):
+        with entry.lock:
+            if entry.current is not None and not force:
+                return
+            if entry.state == FAILED and not force:
+                if entry.path is None:
+                    # Nothing to watch for a fix: retry after MODEL_RETRY_S
+                    if time.monotonic() - entry.failed_at < MODEL_RETRY_S:
+                        return
+                elif entry.source_version() == entry.failed_version:
+                    return
+            previous = entry.current
+            if previous is None:
+                entry.state = LOADING
+            version = entry.source_version()
+            before, started = rss_mb(), time.perf_counter()
+            try:
+                loaded = ModelVersion(entry.loader(), version, entry.generation + 1)
+                loaded.load_ms = round((time.perf_counter() - started) * 1000, 1)
+                if entry.warmup is not None:
+                    warmup_started = time.perf_counter()
+                    entry.warmup(loaded.value)
+                    loaded.warmup_ms = round((time.perf_counter() - warmup_started) * 1000, 1)
+                if entry.on_load is not None:
+                    entry.on_load(loaded)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                entry.failed_version, entry.failed_at = version, time.monotonic()
+                if previous is not None:
+                    entry.reload_failures += 1
+                    entry.error = error
+                    logger.error("Reload of model %s (%s) failed, still serving %s: %s",
+                                 entry.name, version, previous.version, error)
+                else:
+                    entry.state, entry.error = FAILED, error
+                    logger.error("Failed to load model %s: %s", entry.name, error)
+                return
+            # Parallel loads overlap, so per-model deltas are approximate there
+            loaded.rss_delta_mb = round(rss_mb() - before, 1)
+            # The swap is one attribute store; requests holding `previous` finish on it
+            entry.current, entry.generation = loaded, loaded.generation
+            entry.state, entry.error, entry.failed_version = READY, None, None
+            if previous is not None:
+                entry.reloads += 1
+            logger.info("Loaded model %s %s in %.1f ms (warm-up %s ms, +%.1f MB RSS)", entry.name,
+                        version or f"#{loaded.generation}", loaded.load_ms, loaded.warmup_ms, loaded.rss_delta_mb)
+
+    def reload(self, name):
+        """Load `name` again even if it is already loaded (or previously failed).
+
+        The current version keeps serving until the new one is ready, and stays
+        if loading or warming up the new one fails.
+        """
+        self._load(self._entries[name], force=True)
+
+    def preload(self, names=None, background=True):
+        """Load models in parallel; returns the background thread (or None)."""
+        entries = [self._entries[n] for n in (names or self._entries)]
+
+        def run():
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, len(entries)), thread_name_prefix="model-load") as pool:
+                list(pool.map(self._load, entries))
+            logger.info("Preloaded %d models in %.1f ms", len(entries), (time.perf_counter() - started) * 1000)
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        models = {}
+        for name, entry in self._entries.items():
+            current = entry.current
+            models[name] = {
+                "state": entry.state,
+                "version": current.version if current else None,
+                "generation": entry.generation,
+                "loaded_at": current.loaded_at if current else None,
+                "load_ms": current.load_ms if current else None,
+                "warmup_ms": current.warmup_ms if current else None,
+                "rss_delta_mb": current.rss_delta_mb if current else None,
+                "path": entry.path,
+                "reloading": entry.reloading,
+                "reloads": entry.reloads,
+                "reload_failures": entry.reload_failures,
+                "error": entry.error,
+            }
+        return {
+            "loading_mode": MODEL_LOADING,
+            "hot_reload": MODEL_HOT_RELOAD,
+            "ready": all(m["state"] == READY for m in models.values()),
+            "mmap": MODEL_MMAP,
+            "memory": memory_report(),
+            "models": models,
+        }
+
+
+registry = ModelRegistry()
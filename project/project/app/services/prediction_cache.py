@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+
+# ==============================
+# Prediction cache
+# ==============================
+# Best-time and soil-nutrient predictions only depend on a small, finite set of
+# encoded category pairs, so their results can be memoized. Keys are the encoded
+# codes (not raw strings) so "rice"/"Rice" share one entry.
+
+_MISSING = object()
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a size bound and hit/miss counters."""
+
+    def __init__(self, name: str, maxsize: int = 4096):
+        self.name = name
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset counters (used when models are reloaded)."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app.services.prediction_cache import PredictionCache
+from app.utils.logger import logger
+
+# ==============================
+# Inference result cache
+# ==============================
+# Retries over flaky connections resend the same photo or voice clip. Results
+# are cached under a hash of the upload bytes plus the model version, so a
+# retry skips ResNet50/Whisper entirely (and never takes a pool slot).
+#
+#   memory tier  per-process LRU (RESULT_CACHE_SIZE entries per cache)
+#   disk tier    optional SQLite file shared by workers and kept across
+#                restarts (RESULT_CACHE_DISK=true, RESULT_CACHE_PATH); capped
+#                at RESULT_CACHE_DISK_MAX rows per cache, oldest dropped first
+#
+# Entries expire after RESULT_CACHE_TTL_S in both tiers.
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "86400"))
+RESULT_CACHE_DISK = os.getenv("RESULT_CACHE_DISK", "false").lower() in ("1", "true", "yes")
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "db/result_cache.db")
+RESULT_CACHE_DISK_MAX = int(os.getenv("RESULT_CACHE_DISK_MAX", "100000"))
+
+# Hash uploads bigger than this off the event loop (hashlib releases the GIL)
+_HASH_INLINE_LIMIT = 1 << 20
+_PRUNE_EVERY = 256
+
+
+class DiskTier:
+    """SQLite key-value table: (cache, key) -> JSON value with an expiry."""
+
+    def __init__(self, path: str, max_rows: int):
+        self.path = path
+        self.max_rows = max_rows
+        self._conn = None
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " cache TEXT NOT NULL, key BLOB NOT NULL, value TEXT NOT NULL,"
+                " created REAL NOT NULL, expires REAL NOT NULL, PRIMARY KEY (cache, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_results_cache_created ON results (cache, created)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, cache: str, key: bytes):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expires FROM results WHERE cache = ? AND key = ?", (cache, key)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, cache: str, key: bytes, value, expires: float):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO results (cache, key, value, created, expires) VALUES (?, ?, ?, ?, ?)",
+                (cache, key, json.dumps(value), time.time(), expires),
+            )
+            self._puts += 1
+            if self._puts % _PRUNE_EVERY == 0:
+                self._prune(conn, cache)
+
+    def _prune(self, conn, cache: str):
+        conn.execute("DELETE FROM results WHERE expires <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM results WHERE cache = ? AND created <= ("
+            " SELECT created FROM results WHERE cache = ? ORDER BY created DESC LIMIT 1 OFFSET ?)",
+            (cache, cache, self.max_rows),
+        )
+
+    def count(self, cache: str) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM results WHERE cache = ?", (cache,)).fetchone()[0]
+
+
+_disk = DiskTier(RESULT_CACHE_PATH, RESULT_CACHE_DISK_MAX) if RESULT_CACHE_DISK else None
+_caches = []
+
+
+class ResultCache:
+    def __init__(self, name: str, maxsize: int = RESULT_CACHE_SIZE, ttl_s: float = RESULT_CACHE_TTL_S):
+        self.name = name
+        self.ttl_s = ttl_s
+        self.memory = PredictionCache(f"{name}_results", maxsize=maxsize)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        _caches.append(self)
+
+    def _key(self, data: bytes, version: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.name}\0{version}\0".encode())
+        digest.update(data)
+        return digest.digest()
+
+    async def key(self, data: bytes, version: str) -> bytes:
+        """Cache key for an upload under a given model version."""
+        if len(data) > _HASH_INLINE_LIMIT:
+            return await run_in_threadpool(self._key, data, version)
+        return self._key(data, version)
+
+    async def get(self, key: bytes):
+        entry = self.memory.get(key)
+        if entry is not None and entry[0] > time.time():
+            self.memory_hits += 1
+            return entry[1]
+        if _disk is not None:
+            try:
+                found = await run_in_threadpool(_disk.get, self.name, key)
+            except sqlite3.Error as e:
+                # Locked or corrupt file: serve the request as a miss
+                logger.warning("Result cache %s: disk read failed: %s", self.name, e)
+                found = None
+            if found is not None:
+                value, expires = found
+                self.memory.put(key, (expires, value))
+                self.disk_hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    async def put(self, key: bytes, value):
+        expires = time.time() + self.ttl_s
+        self.memory.put(key, (expires, value))
+        if _disk is not None:
+            try:
+                await run_in_threadpool(_disk.put, self.name, key, value, expires)
+            except sqlite3.Error as e:
+                # The memory tier still has it; the disk tier is best-effort
+                logger.warning("Result cache %s: disk write failed: %s", self.name, e)
+
+    def stats(self):
+        total = self.memory_hits + self.disk_hits + self.misses
+        try:
+            disk_size = _disk.count(self.name) if _disk is not None else None
+        except sqlite3.Error:
+            disk_size = None
+        return {
+            "name": self.name,
+            "memory_size": len(self.memory),
+            "memory_maxsize": self.memory.maxsize,
+            "disk": _disk is not None,
+            "disk_size": disk_size,
+            "ttl_s": self.ttl_s,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / total, 4) if total else 0.0,
+        }
+
+
+def result_cache_stats():
+    return [cache.stats() for cache in _caches]
@@ -0,0 +1,135 @@
+import functools
+import os
+
+from app.services.model_registry import registry
+from app.utils.logger import logger
+
+# ==============================
+# Speech engine
+# ==============================
+# Which Whisper model transcribes a clip and how it decodes. The defaults are
+# plain whisper.load_model("base") + transcribe(); every option below trades
+# some accuracy for CPU time, so compare real-time factor and WER drift with
+# benchmarks/bench_whisper.py before turning one on.
+#
+#   WHISPER_MODEL         model size for regular clips (base)
+#   WHISPER_SHORT_MODEL   smaller model for short clips, e.g. "tiny". Off by
+#                         default: unset, every clip uses WHISPER_MODEL.
+#                         The encoder always processes a 30 s window, so a
+#                         3 s command costs as much as a 30 s note on the same
+#                         model; a smaller model is the only way to make it cheaper
+#   WHISPER_SHORT_CLIP_S  clips up to this many seconds use it (8)
+#   WHISPER_QUANTIZE      "int8": dynamic int8 quantization of the Linear layers
+#                         (attention and MLP, most of the FLOPs); "none"
+#   WHISPER_LANGUAGE      pin the language ("mr", "hi", "en", ...) instead of
+#                         detecting it, which costs an extra encoder pass per clip
+#   WHISPER_DECODE        "greedy" (Whisper's default) or "beam"
+#   WHISPER_BEAM_SIZE     hypotheses kept with "beam" (5)
+#   WHISPER_FALLBACK      re-decode at higher temperatures when a segment looks
+#                         like a failed decode (Whisper's default); "false"
+#                         decodes every segment exactly once
+#
+# Streamed voice notes (app/services/voice_streaming.py) always use
+# WHISPER_MODEL: their length isn't known up front.
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_SHORT_MODEL = os.getenv("WHISPER_SHORT_MODEL", "")
+WHISPER_SHORT_CLIP_S = float(os.getenv("WHISPER_SHORT_CLIP_S", "8"))
+WHISPER_QUANTIZE = os.getenv("WHISPER_QUANTIZE", "none").lower()
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "")
+WHISPER_DECODE = os.getenv("WHISPER_DECODE", "greedy").lower()
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "5"))
+WHISPER_FALLBACK = os.getenv("WHISPER_FALLBACK", "true").lower() in ("1", "true", "yes")
+
+# Whisper's own default temperature schedule
+FALLBACK_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+class SpeechConfig:
+    """Model choice and decoding options; the app's comes from the environment."""
+
+    def __init__(self, model=WHISPER_MODEL, short_model=WHISPER_SHORT_MODEL, short_clip_s=WHISPER_SHORT_CLIP_S,
+                 quantize=WHISPER_QUANTIZE, language=WHISPER_LANGUAGE, decode=WHISPER_DECODE,
+                 beam_size=WHISPER_BEAM_SIZE, fallback=WHISPER_FALLBACK):
+        if quantize not in ("none", "int8"):
+            raise ValueError("WHISPER_QUANTIZE must be 'none' or 'int8'")
+        if decode not in ("greedy", "beam"):
+            raise ValueError("WHISPER_DECODE must be 'greedy' or 'beam'")
+        self.model = model
+        self.short_model = short_model or None
+        self.short_clip_s = short_clip_s
+        self.quantize = quantize
+        self.language = language or None
+        self.decode = decode
+        self.beam_size = beam_size
+        self.fallback = fallback
+
+    def model_for(self, seconds=None) -> str:
+        """Model size for a clip of `seconds` (None: unknown length)."""
+        if self.short_model and seconds is not None and seconds <= self.short_clip_s:
+            return self.short_model
+        return self.model
+
+    def transcribe_options(self, language=None) -> dict:
+        """Keyword arguments for model.transcribe(); `language` overrides the pinned one."""
+        return {
+            "language": language or self.language,
+            "beam_size": self.beam_size if self.decode == "beam" else None,
+            "temperature": FALLBACK_TEMPERATURES if self.fallback else 0.0,
+            # CPU inference; Whisper would warn and fall back to fp32 anyway
+            "fp16": False,
+        }
+
+    def version(self) -> str:
+        """Everything that changes transcripts, for result-cache keys."""
+        short = f"+{self.short_model}<={self.short_clip_s:g}s" if self.short_model else ""
+        decode = f"beam{self.beam_size}" if self.decode == "beam" else "greedy"
+        return (f"whisper:{self.model}{short}:{self.quantize}:{self.language or 'auto'}:{decode}"
+                f"{':fallback' if self.fallback else ''}")
+
+
+def quantize_linear_layers(model):
+    """Dynamic int8 quantization of every Linear layer, in place."""
+    import torch
+    from torch import nn
+
+    for module in model.modules():
+        if isinstance(module, nn.Linear):
+            # whisper.model.Linear only overrides forward() to cast weights to
+            # the input's dtype (a no-op in fp32); quantize_dynamic only swaps
+            # exact nn.Linear modules
+            module.__class__ = nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def load_whisper_model(size: str, quantize: str = WHISPER_QUANTIZE):
+    import whisper
+    # Not memory-mapped even with MODEL_MMAP: the checkpoints are fp16 and
+    # Whisper runs in fp32 on CPU (its LayerNorm upcasts the input, not the
+    # weights), so load_model's fp32 copy is what gets served
+    model = whisper.load_model(size, device="cpu" if quantize == "int8" else None)
+    if quantize == "int8":
+        model = quantize_linear_layers(model)
+    logger.info("Whisper %s ready (quantize=%s)", size, quantize)
+    return model
+
+
+def warm_up_whisper(model):
+    """Transcribe a second of silence; a model that can't decode fails here instead of in requests."""
+    import numpy as np
+    from whisper.audio import SAMPLE_RATE
+    model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), **{**engine.transcribe_options(), "temperature": 0.0})
+
+
+engine = SpeechConfig()
+
+
+def registry_name(size: str) -> str:
+    """Model registry entry of a Whisper size: "whisper" for WHISPER_MODEL, "whisper_<size>" otherwise."""
+    return "whisper" if size == engine.model else f"whisper_{size}"
+
+
+# Whisper models, loaded on first use (see app/services/model_registry.py)
+SPEECH_MODELS = {registry_name(size): size for size in filter(None, (engine.model, engine.short_model))}
+for _name, _size in SPEECH_MODELS.items():
+    registry.register(_name, functools.partial(load_whisper_model, _size), warmup=warm_up_whisper)
@@ -0,0 +1,65 @@
+import os
+
+import pandas as pd
+
+# ==============================
+# Chunked tabular uploads
+# ==============================
+# Bulk endpoints read uploads a chunk of rows at a time and stream results
+# back, so memory stays bounded by the chunk size rather than the file size.
+# CSV needs nothing extra; Parquet and Arrow IPC/Feather need pyarrow.
+
+INPUT_FORMATS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+OUTPUT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+class TabularFormatError(ValueError):
+    pass
+
+
+def input_format(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[-1].lower()
+    if ext not in INPUT_FORMATS:
+        raise TabularFormatError(f"Unsupported file type: {ext} (expected one of {', '.join(INPUT_FORMATS)})")
+    return INPUT_FORMATS[ext]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise TabularFormatError("Parquet/Arrow uploads need pyarrow installed; upload CSV instead")
+    return pyarrow
+
+
+def iter_frames(fileobj, fmt: str, chunk_rows: int):
+    """Yield DataFrames of at most chunk_rows rows from a CSV/Parquet/Arrow file object."""
+    if fmt == "csv":
+        yield from pd.read_csv(fileobj, chunksize=chunk_rows)
+        return
+    pa = _pyarrow()
+    if fmt == "parquet":
+        batches = pa.parquet.ParquetFile(fileobj).iter_batches(batch_size=chunk_rows)
+    else:
+        try:
+            reader = pa.ipc.open_file(fileobj)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            # Arrow IPC stream format (no footer)
+            fileobj.seek(0)
+            batches = pa.ipc.open_stream(fileobj)
+    for batch in batches:
+        # Record batches from Arrow writers can be larger than chunk_rows
+        for start in range(0, batch.num_rows, chunk_rows):
+            yield batch.slice(start, chunk_rows).to_pandas()
+
+
+def iter_encoded(frames, out_format: str):
+    """Serialize DataFrames as one CSV (single header) or NDJSON stream."""
+    for i, frame in enumerate(frames):
+        if out_format == "csv":
+            yield frame.to_csv(index=False, header=(i == 0))
+        elif len(frame):
+            yield frame.to_json(orient="records", lines=True) + "\n"
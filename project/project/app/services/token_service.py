@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import ExpiredSignatureError, JWTError, jwt
+
+from app.services.prediction_cache import PredictionCache
+from app.utils.logger import logger
+
+load_dotenv()
+
+# ==============================
+# Access token verification
+# ==============================
+# Tokens from auth_service.create_access_token are verified once, then their
+# claims are cached (keyed by a hash of the token) until they expire. A repeat
+# request with the same token costs a dict lookup instead of an HMAC + JSON
+# parse.
+#
+# Key rotation: with JWT_KEYS_FILE set, signing keys come from a JSON file
+#   {"active": "2025-10", "keys": {"2025-10": "<secret>", "2025-07": "<secret>"}}
+# which is re-read when its mtime changes (checked every JWT_KEYS_CHECK_S).
+# New tokens are signed with "active" and carry its id in the "kid" header;
+# tokens signed with any listed key stay valid. Removing a key revokes its
+# tokens, including ones already cached. Without the file, SECRET_KEY is the
+# only key.
+#
+#   AUTH_REQUIRED   require a bearer token on the prediction endpoints
+
+SECRET_KEY = os.getenv("SECRET_KEY", "default_secret")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+JWT_KEYS_FILE = os.getenv("JWT_KEYS_FILE")
+JWT_KEYS_CHECK_S = float(os.getenv("JWT_KEYS_CHECK_S", "5"))
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "false").lower() in ("1", "true", "yes")
+
+DEFAULT_KID = "default"
+
+
+class TokenInvalid(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class KeyRing:
+    """Signing keys by id, hot-reloaded from JWT_KEYS_FILE."""
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.keys = {DEFAULT_KID: SECRET_KEY}
+        self.active = DEFAULT_KID
+        self.version = 0
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False):
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        with self._lock:
+            self._next_check = now + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return
+                with open(self.path) as f:
+                    data = json.load(f)
+                keys, active = dict(data["keys"]), data["active"]
+                if active not in keys:
+                    raise ValueError(f"active key {active!r} is not in keys")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # Keep serving with the keys we have
+                logger.error("Could not load JWT keys from %s: %s", self.path, e)
+                return
+            self.keys, self.active, self._mtime = keys, active, mtime
+            self.version += 1
+            logger.info("Loaded %d JWT keys from %s (active=%s)", len(keys), self.path, active)
+
+    def signing_key(self):
+        self.refresh()
+        return self.active, self.keys[self.active]
+
+
+keyring = KeyRing(JWT_KEYS_FILE, JWT_KEYS_CHECK_S)
+token_cache = PredictionCache("access_tokens", maxsize=JWT_CACHE_SIZE)
+_counters = {"cache_hits": 0, "decoded": 0, "missing": 0, "expired": 0, "invalid": 0, "unknown_key": 0}
+_seconds = {"cache_hits": 0.0, "decoded": 0.0}
+
+
+def sign_token(claims: dict) -> str:
+    kid, secret = keyring.signing_key()
+    return jwt.encode(claims, secret, algorithm=ALGORITHM, headers={"kid": kid})
+
+
+def _decode(token: str):
+    try:
+        kid = jwt.get_unverified_header(token).get("kid", DEFAULT_KID)
+    except JWTError:
+        raise TokenInvalid("invalid")
+    secret = keyring.keys.get(kid)
+    if secret is None:
+        raise TokenInvalid("unknown_key")
+    try:
+        claims = jwt.decode(token, secret, algorithms=[ALGORITHM])
+    except ExpiredSignatureError:
+        raise TokenInvalid("expired")
+    except JWTError:
+        raise TokenInvalid("invalid")
+    return kid, secret, claims
+
+
+def verify_token(token: str) -> dict:
+    """Return the token's claims, from the cache when it was already verified."""
+    started = time.perf_counter()
+    keyring.refresh()
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        kid, secret, claims, exp = cached
+        # Still signed by a current key (rotation can remove or replace it)
+        if keyring.keys.get(kid) == secret and (exp is None or exp > time.time()):
+            _counters["cache_hits"] += 1
+            _seconds["cache_hits"] += time.perf_counter() - started
+            return claims
+    try:
+        kid, secret, claims = _decode(token)
+    except TokenInvalid as e:
+        _counters[e.reason] += 1
+        raise
+    token_cache.put(key, (kid, secret, claims, claims.get("exp")))
+    _counters["decoded"] += 1
+    _seconds["decoded"] += time.perf_counter() - started
+    return claims
+
+
+bearer = HTTPBearer(auto_error=False)
+
+
+async def current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer)) -> Optional[dict]:
+    """Claims of the bearer token, or None when the request has no token."""
+    if credentials is None:
+        return None
+    try:
+        return verify_token(credentials.credentials)
+    except TokenInvalid as e:
+        raise HTTPException(status_code=401, detail=f"Token {e.reason}", headers={"WWW-Authenticate": "Bearer"})
+
+
+async def require_user(claims: Optional[dict] = Depends(current_user)) -> dict:
+    if claims is None:
+        _counters["missing"] += 1
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return claims
+
+
+# Route dependencies for the prediction endpoints; empty unless AUTH_REQUIRED
+PROTECTED = [Depends(require_user)] if AUTH_REQUIRED else []
+
+
+def token_stats():
+    def avg_us(name):
+        return round(_seconds[name] / _counters[name] * 1e6, 2) if _counters[name] else 0.0
+
+    return {
+        "auth_required": AUTH_REQUIRED,
+        "active_key": keyring.active,
+        "keys": sorted(keyring.keys),
+        "keyring_version": keyring.version,
+        **_counters,
+        "avg_cached_us": avg_us("cache_hits"),
+        "avg_decode_us": avg_us("decoded"),
+        "cache": token_cache.stats(),
+    }
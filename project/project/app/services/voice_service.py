@@ -1,27 +1,106 @@
-import whisper
 import tempfile
 import os
 from fastapi import UploadFile
+from app.services.executors import InferenceRejected, get_pool
+from app.services.audio_decoding import SAMPLE_RATE, AudioDecodeError, DecodeStats, decode_audio, read_upload, record
+from app.services.voice_streaming import stream_transcription
+from app.services.metrics import timed
+from app.services.model_registry import registry
+from app.services.speech_engine import engine, registry_name
+from app.services.result_cache import ResultCache
+from app.utils.logger import logger
 
-# Whisper model (सुरुवातीला एकदाच load होईल)
-model = whisper.load_model("base")
+# Re-sent clips reuse the earlier transcript (app/services/result_cache.py)
+voice_result_cache = ResultCache("voice")
+
+# Transcription runs on the shared speech pool (app/services/executors.py)
+speech_pool = get_pool("speech")
+
+# Model choice and decoding options (app/services/speech_engine.py)
+TRANSCRIBE_OPTIONS = engine.transcribe_options()
+
+# A stream takes a speech-pool slot only while one of its windows is being
+# transcribed, not while waiting on a slow client; open streams have their own cap
+VOICE_STREAM_MAX_OPEN = int(os.getenv("VOICE_STREAM_MAX_OPEN", "32"))
+_open_streams = 0
+
+@timed("whisper.transcribe")
+def transcribe(audio):
+    # `audio` is either a float32 16 kHz waveform or a file path (length unknown)
+    seconds = None if isinstance(audio, str) else len(audio) / SAMPLE_RATE
+    model = registry.get(registry_name(engine.model_for(seconds)))
+    return model.transcribe(audio, **TRANSCRIBE_OPTIONS)
+
+@timed("whisper.transcribe_window")
+def transcribe_window(waveform, prompt=None):
+    # Previous windows' text is passed as the prompt to keep context across cuts
+    return registry.get("whisper").transcribe(waveform, initial_prompt=prompt, **TRANSCRIBE_OPTIONS)
+
+async def _run_window(waveform, prompt):
+    async with speech_pool.admit():
+        return await speech_pool.run(transcribe_window, waveform, prompt)
+
+async def process_voice_stream(chunks, file_ext: str):
+    """Streaming counterpart of process_voice_input: yields partial transcripts.
+
+    `chunks` is an async iterator of raw upload bytes (see app/services/voice_streaming.py).
+    """
+    global _open_streams
+    if file_ext not in [".mp3", ".mp4", ".m4a", ".wav"]:
+        raise ValueError("Unsupported file format: " + file_ext)
+    if _open_streams >= VOICE_STREAM_MAX_OPEN:
+        raise InferenceRejected("speech", 429, speech_pool.retry_after, "has too many open streams")
+    _open_streams += 1
+    try:
+        async for partial in stream_transcription(chunks, file_ext, _run_window):
+            yield partial
+    finally:
+        _open_streams -= 1
+
+def open_streams() -> int:
+    return _open_streams
 
 async def process_voice_input(audio: UploadFile):
+    tmp_path = None
     try:
         # File extension check
         file_ext = os.path.splitext(audio.filename)[-1].lower()
         if file_ext not in [".mp3", ".mp4", ".m4a", ".wav"]:
             raise ValueError("Unsupported file format: " + file_ext)
 
-        # Save temp audio file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp:
-            tmp.write(await audio.read())
-            tmp_path = tmp.name
+        stats = DecodeStats()
+        data = await read_upload(audio, stats)
+        cache_key = await voice_result_cache.key(data, engine.version())
+        cached = await voice_result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        async with speech_pool.admit():
+            try:
+                # Decode straight to a waveform in memory (app/services/audio_decoding.py)
+                waveform, stats = await speech_pool.run(decode_audio, data, file_ext, stats)
+                result = await speech_pool.run(transcribe, waveform)
+            except AudioDecodeError as e:
+                logger.info("In-memory decode failed for %s, using temp file: %s", file_ext, e)
+                # Save temp audio file
+                with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp:
+                    tmp.write(data)
+                    tmp_path = tmp.name
+                stats.decoder = "tempfile"
+                stats.disk_bytes_avoided = 0
+
+                # Transcribe
+                result = await speech_pool.run(transcribe, tmp_path)
 
-        # Transcribe
-        result = model.transcribe(tmp_path)
-        return {"text": result["text"]}
+        record(stats)
+        logger.info("Voice input decoded: decoder=%s bytes_read=%s bytes_copied=%s disk_bytes_avoided=%s",
+                    stats.decoder, stats.bytes_read, stats.bytes_copied, stats.disk_bytes_avoided)
+        response = {"text": result["text"]}
+        await voice_result_cache.put(cache_key, response)
+        return response
 
+    except InferenceRejected:
+        raise
     except Exception as e:
         return {"error": str(e)}
     finally:
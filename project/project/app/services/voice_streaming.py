@@ -0,0 +1,336 @@
+import asyncio
+import os
+import re
+import struct
+import threading
+import time
+from math import gcd
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from app.services.audio_decoding import SAMPLE_RATE, AudioDecodeError
+
+# ==============================
+# Streaming transcription
+# ==============================
+# Long voice notes are decoded incrementally, cut into windows at pauses
+# (energy-based voice activity detection) and transcribed one window at a time,
+# so partial text can be sent back as soon as the first window is done.
+# Only the current window is ever held in memory:
+#   VOICE_STREAM_WINDOW_S      hard upper bound of a window (seconds)
+#   VOICE_STREAM_MIN_WINDOW_S  don't cut at a pause before this many seconds
+#   VOICE_STREAM_OVERLAP_S     audio carried over when no pause was found
+
+WINDOW_S = float(os.getenv("VOICE_STREAM_WINDOW_S", "20"))
+MIN_WINDOW_S = float(os.getenv("VOICE_STREAM_MIN_WINDOW_S", "5"))
+OVERLAP_S = float(os.getenv("VOICE_STREAM_OVERLAP_S", "1.0"))
+
+FRAME_S = 0.03               # VAD frame length
+SILENCE_RMS = 0.01           # frames quieter than this (and than 10% of the window's loud frames) are pauses
+BLOCK_BYTES = 64 * 1024      # PCM read size
+
+
+# ------------------------------
+# Incremental decoders: async byte chunks -> (sample_rate, float32 mono block)
+# ------------------------------
+async def _replay(head: bytes, source):
+    yield head
+    async for chunk in source:
+        yield chunk
+
+
+async def wav_pcm_blocks(chunks):
+    """Parse a WAV stream chunk by chunk without buffering the whole file.
+
+    Encodings other than 8/16/32-bit PCM and 32-bit float go to ffmpeg.
+    """
+    buffer = bytearray()
+    header = bytearray()    # bytes consumed so far, replayed to ffmpeg if needed
+    source = chunks.__aiter__()
+
+    async def fill(n):
+        while len(buffer) < n:
+            try:
+                buffer.extend(await source.__anext__())
+            except StopAsyncIteration:
+                return False
+        return True
+
+    def consume(n):
+        header.extend(buffer[:n])
+        del buffer[:n]
+
+    if not await fill(12) or buffer[:4] != b"RIFF" or buffer[8:12] != b"WAVE":
+        raise AudioDecodeError("Not a RIFF/WAVE stream")
+    consume(12)
+
+    fmt = None
+    while True:
+        if not await fill(8):
+            raise AudioDecodeError("WAV stream has no data chunk")
+        chunk_id, size = bytes(buffer[:4]), struct.unpack("<I", buffer[4:8])[0]
+        consume(8)
+        if chunk_id == b"data":
+            break
+        padded = size + (size & 1)
+        if not await fill(padded):
+            raise AudioDecodeError("Truncated WAV header")
+        if chunk_id == b"fmt ":
+            tag, channels, rate, _, block_align, bits = struct.unpack("<HHIIHH", buffer[:16])
+            if tag == 0xFFFE and size >= 26:   # WAVE_FORMAT_EXTENSIBLE: real tag is in the sub-format
+                tag = struct.unpack("<H", buffer[24:26])[0]
+            fmt = (tag, channels, rate, block_align, bits)
+        consume(padded)
+
+    if fmt is None:
+        raise AudioDecodeError("WAV stream has no fmt chunk")
+    tag, channels, rate, block_align, bits = fmt
+    offset = 0.0
+    if (tag, bits) == (1, 8):     # unsigned 8-bit
+        dtype, scale, offset = "u1", 128.0, 128.0
+    elif (tag, bits) == (1, 16):
+        dtype, scale = "<i2", 32768.0
+    elif (tag, bits) == (1, 32):
+        dtype, scale = "<i4", 2147483648.0
+    elif (tag, bits) == (3, 32):
+        dtype, scale = "<f4", 1.0
+    else:
+        # 24-bit PCM, A-law, ADPCM, ...: let ffmpeg decode the whole stream
+        async for block in ffmpeg_pcm_blocks(_replay(bytes(header + buffer), source)):
+            yield block
+        return
+
+    # Streamed WAVs often carry a 0 / 0xFFFFFFFF placeholder size: read to the end
+    remaining = size if 0 < size < 0xFFFFFFFF else None
+    while remaining is None or remaining > 0:
+        more = await fill(BLOCK_BYTES)
+        usable = len(buffer) - len(buffer) % block_align
+        if remaining is not None:
+            usable = min(usable, remaining - remaining % block_align)
+            remaining -= usable
+            if not usable:
+                return
+        if usable:
+            samples = (np.frombuffer(bytes(buffer[:usable]), dtype=dtype).astype(np.float32) - offset) / scale
+            del buffer[:usable]
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+            yield rate, samples
+        if not more:
+            return
+
+
+async def ffmpeg_pcm_blocks(chunks):
+    """Decode any ffmpeg-readable stream to 16 kHz PCM, feeding stdin as chunks arrive."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "pipe:1",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg is not installed")
+
+    async def feed():
+        try:
+            async for chunk in chunks:
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            proc.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    remainder = b""
+    try:
+        while True:
+            out = await proc.stdout.read(BLOCK_BYTES)
+            if not out:
+                break
+            out = remainder + out
+            usable = len(out) - len(out) % 2
+            remainder = out[usable:]
+            yield SAMPLE_RATE, np.frombuffer(out[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+    finally:
+        feeder.cancel()
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+
+
+def pcm_blocks(chunks, file_ext: str):
+    return wav_pcm_blocks(chunks) if file_ext == ".wav" else ffmpeg_pcm_blocks(chunks)
+
+
+# ------------------------------
+# VAD-based windowing
+# ------------------------------
+def _frame_rms(samples: np.ndarray, frame: int) -> np.ndarray:
+    n = len(samples) // frame
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:n * frame].reshape(n, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def _to_16k(samples: np.ndarray, rate: int) -> np.ndarray:
+    if rate == SAMPLE_RATE:
+        return samples
+    g = gcd(SAMPLE_RATE, rate)
+    return resample_poly(samples, SAMPLE_RATE // g, rate // g).astype(np.float32, copy=False)
+
+
+class VadChunker:
+    """Cuts a sample stream into windows of at most `window_s`, preferring pauses."""
+
+    def __init__(self, rate: int, window_s: float = WINDOW_S, min_window_s: float = MIN_WINDOW_S,
+                 overlap_s: float = OVERLAP_S):
+        self.rate = rate
+        self.frame = max(1, int(FRAME_S * rate))
+        self.max_len = int(window_s * rate)
+        self.min_len = min(int(min_window_s * rate), self.max_len)
+        self.overlap = min(int(overlap_s * rate), self.max_len // 2)
+        self._blocks = []
+        self._length = 0
+        self.offset = 0      # samples already emitted, for timestamps
+        self._carried = 0    # samples at the start of the next window repeated from the last one
+
+    def feed(self, samples: np.ndarray):
+        """Add samples; return a list of (start_s, end_s, window_16k, overlaps) ready to transcribe.
+
+        `overlaps` is true when the window starts with audio repeated from the previous one.
+        """
+        self._blocks.append(samples)
+        self._length += len(samples)
+        windows = []
+        while self._length >= self.max_len:
+            windows.extend(self._cut())
+        return windows
+
+    def flush(self):
+        if not self._length:
+            return []
+        audio = np.concatenate(self._blocks)
+        self._blocks, self._length = [], 0
+        return self._emit(audio, len(audio), carry=0)
+
+    def _cut(self):
+        audio = np.concatenate(self._blocks)
+        rms = _frame_rms(audio[:self.max_len], self.frame)
+        first, last = self.min_len // self.frame, len(rms)
+        cut, carry = self.max_len, self.overlap
+        if last > first:
+            loud = np.percentile(rms, 90)
+            quietest = first + int(np.argmin(rms[first:last]))
+            if rms[quietest] < max(SILENCE_RMS, 0.1 * loud):
+                # Cut in the middle of the pause; nothing needs to be repeated
+                cut, carry = quietest * self.frame + self.frame // 2, 0
+        rest = audio[cut - carry:]
+        self._blocks, self._length = [rest], len(rest)
+        return self._emit(audio, cut, carry)
+
+    def _emit(self, audio, cut, carry):
+        window = audio[:cut]
+        start = self.offset / self.rate
+        self.offset += cut - carry
+        overlaps, self._carried = self._carried > 0, carry
+        # Skip windows with no speech at all (saves a Whisper run, avoids hallucinated text)
+        if not len(window) or _frame_rms(window, self.frame).max(initial=0.0) < SILENCE_RMS:
+            return []
+        return [(start, start + cut / self.rate, _to_16k(window, self.rate), overlaps)]
+
+
+# ------------------------------
+# Overlap de-duplication
+# ------------------------------
+_WORD = re.compile(r"[^\w']+")
+
+
+def merge_overlap(previous_words, text: str, max_words: int = 8) -> str:
+    """Drop words at the start of `text` that repeat the end of the previous window."""
+    words = text.split()
+    norm_prev = [_WORD.sub("", w).lower() for w in previous_words[-max_words:]]
+    norm_new = [_WORD.sub("", w).lower() for w in words[:max_words]]
+    for k in range(min(len(norm_prev), len(norm_new)), 0, -1):
+        if norm_prev[-k:] == norm_new[:k]:
+            return " ".join(words[k:])
+    return text.strip()
+
+
+# ------------------------------
+# Metrics
+# ------------------------------
+_stats_lock = threading.Lock()
+stream_totals = {"streams": 0, "windows": 0, "ttft_count": 0, "ttft_total_ms": 0.0, "ttft_max_ms": 0.0}
+
+
+def _record(windows: int, ttft_ms):
+    with _stats_lock:
+        stream_totals["streams"] += 1
+        stream_totals["windows"] += windows
+        if ttft_ms is not None:
+            stream_totals["ttft_count"] += 1
+            stream_totals["ttft_total_ms"] += ttft_ms
+            stream_totals["ttft_max_ms"] = max(stream_totals["ttft_max_ms"], ttft_ms)
+
+
+def stream_stats():
+    with _stats_lock:
+        count = stream_totals["ttft_count"]
+        return {
+            "streams": stream_totals["streams"],
+            "windows": stream_totals["windows"],
+            "time_to_first_token_ms": {
+                "count": count,
+                "avg": round(stream_totals["ttft_total_ms"] / count, 2) if count else 0.0,
+                "max": round(stream_totals["ttft_max_ms"], 2),
+            },
+        }
+
+
+# ------------------------------
+# Driver
+# ------------------------------
+async def stream_transcription(chunks, file_ext: str, run_transcribe):
+    """Yield partial results as each window is transcribed, then a final summary.
+
+    `run_transcribe(waveform, prompt)` is awaited once per window.
+    """
+    started = time.perf_counter()
+    ttft_ms = None
+    words, chunker, index = [], None, 0
+
+    async def transcribe_windows(windows):
+        nonlocal ttft_ms, index
+        for start, end, waveform, overlaps in windows:
+            prompt = " ".join(words[-32:]) or None
+            result = await run_transcribe(waveform, prompt)
+            # Only a window cut without a pause repeats audio; otherwise a
+            # repeated word at its start was really said twice
+            text = merge_overlap(words, result["text"]) if overlaps else result["text"].strip()
+            if text and ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+            words.extend(text.split())
+            yield {"index": index, "start": round(start, 2), "end": round(end, 2), "text": text}
+            index += 1
+
+    try:
+        async for rate, samples in pcm_blocks(chunks, file_ext):
+            if chunker is None:
+                chunker = VadChunker(rate)
+            async for partial in transcribe_windows(chunker.feed(samples)):
+                yield partial
+        if chunker is not None:
+            async for partial in transcribe_windows(chunker.flush()):
+                yield partial
+    finally:
+        _record(index, ttft_ms)
+
+    yield {
+        "done": True,
+        "text": " ".join(words),
+        "windows": index,
+        "time_to_first_token_ms": round(ttft_ms, 2) if ttft_ms is not None else None,
+    }
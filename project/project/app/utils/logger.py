@@ -1,27 +1,209 @@
 # utils/logger.py
+import atexit
+import copy
+import itertools
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
-LOG_DIR = Path("logs")
+# ==============================
+# Queued logging
+# ==============================
+# Request threads only put records on a bounded in-memory queue; a listener
+# thread does the formatting and the console/file I/O (including rotation),
+# so a slow disk never stalls a request.
+#
+#   LOG_DIR           directory of agrosense.log (logs)
+#   LOG_CONSOLE       also write records to stderr (true)
+#   LOG_LEVEL         minimum level (INFO)
+#   LOG_FORMAT        "json" (one object per line) or "text"
+#   LOG_QUEUE_SIZE    records the queue holds (10000)
+#   LOG_QUEUE_POLICY  what happens when it is full:
+#                     "drop"  discard the new record and count it
+#                     "block" wait for space (never loses records)
+#   LOG_SAMPLE        per-level sampling for busy call sites, e.g.
+#                     "INFO=0.1,DEBUG=0.01" keeps 1 in 10 INFO and 1 in 100
+#                     DEBUG records from each call site (always the first)
+
+LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "agrosense.log"
 
-logger = logging.getLogger("AgroSense")
-logger.setLevel(logging.INFO)
+LOG_CONSOLE = os.getenv("LOG_CONSOLE", "true").lower() in ("1", "true", "yes")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_QUEUE_POLICY = os.getenv("LOG_QUEUE_POLICY", "drop").lower()
+LOG_SAMPLE = os.getenv("LOG_SAMPLE", "")
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+_traceback_formatter = logging.Formatter()
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed via extra={...} are included."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "pid": record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+def parse_sample_rates(spec: str) -> dict:
+    """"INFO=0.1,DEBUG=0.01" -> {logging.INFO: 0.1, logging.DEBUG: 0.01}"""
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, rate = part.partition("=")
+        level = logging.getLevelName(name.strip().upper())
+        if not isinstance(level, int):
+            raise ValueError(f"LOG_SAMPLE: unknown level {name!r}")
+        rates[level] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps 1 in round(1/rate) records per (call site, level); rate 0 drops the level."""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+        self.every = {level: round(1 / rate) if rate > 0 else 0 for level, rate in rates.items() if rate < 1}
+        self._counters = {}
+        self.sampled_out = 0
+
+    def filter(self, record):
+        every = self.every.get(record.levelno)
+        if every is None:
+            return True
+        if every:
+            counter = self._counters.setdefault((record.pathname, record.lineno, record.levelno), itertools.count())
+            if next(counter) % every == 0:
+                return True
+        self.sampled_out += 1
+        return False
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler with a full-queue policy and counters."""
+
+    def __init__(self, log_queue, policy: str = "drop"):
+        if policy not in ("drop", "block"):
+            raise ValueError("LOG_QUEUE_POLICY must be 'drop' or 'block'")
+        super().__init__(log_queue)
+        self.policy = policy
+        self.enqueued = 0
+        self.dropped = 0
 
-# Console handler
-ch = logging.StreamHandler()
-ch.setLevel(logging.INFO)
-ch_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-ch.setFormatter(ch_formatter)
+    def prepare(self, record):
+        # Merge args and render tracebacks now, while they refer to live
+        # objects; formatting proper happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-# Rotating file handler (5 MB per file, keep 3 backups)
-fh = RotatingFileHandler(LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3)
-fh.setLevel(logging.INFO)
-fh.setFormatter(ch_formatter)
+    def enqueue(self, record):
+        if self.policy == "block":
+            self.queue.put(record)
+        else:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                return
+        self.enqueued += 1
+
+
+class DrainingQueueListener(QueueListener):
+    """QueueListener whose stop() waits for room instead of failing on a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def build_handlers(log_file=LOG_FILE, fmt: str = LOG_FORMAT, console: bool = True):
+    """Console + rotating file handlers (5 MB per file, keep 3 backups)."""
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()] if console else []
+    handlers.append(RotatingFileHandler(log_file, maxBytes=5 * 1024 * 1024, backupCount=3))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def attach_queue(target: logging.Logger, handlers, queue_size: int = LOG_QUEUE_SIZE,
+                 policy: str = LOG_QUEUE_POLICY, sample_rates: dict = None):
+    """Route target's records through a bounded queue to handlers on a listener thread."""
+    handler = BoundedQueueHandler(queue.Queue(queue_size), policy)
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+    target.addHandler(handler)
+    listener = DrainingQueueListener(handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return handler, listener
+
+
+logger = logging.getLogger("AgroSense")
+logger.setLevel(LOG_LEVEL)
 
 # Avoid duplicate handlers on reload
 if not logger.handlers:
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+    _handlers = build_handlers(console=LOG_CONSOLE)
+    queue_handler, _listener = attach_queue(logger, _handlers, sample_rates=parse_sample_rates(LOG_SAMPLE))
+
+    def _stop_listener():
+        # Flushes whatever is still queued
+        _listener.stop()
+
+    def _restart_listener_after_fork():
+        # gunicorn forks workers from a preloaded master: the listener thread
+        # doesn't survive the fork, so each worker gets its own queue and thread
+        global _listener
+        queue_handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+        _listener = DrainingQueueListener(queue_handler.queue, *_handlers, respect_handler_level=True)
+        _listener.start()
+
+    atexit.register(_stop_listener)
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+
+def logging_stats():
+    handler = next(h for h in logger.handlers if isinstance(h, BoundedQueueHandler))
+    sampler = next((f for f in handler.filters if isinstance(f, SamplingFilter)), None)
+    return {
+        "level": logging.getLevelName(logger.level),
+        "format": LOG_FORMAT,
+        "policy": handler.policy,
+        "queue_size": handler.queue.maxsize,
+        "queue_depth": handler.queue.qsize(),
+        "enqueued": handler.enqueued,
+        "dropped": handler.dropped,
+        "sample_rates": {logging.getLevelName(level): rate for level, rate in sampler.rates.items()} if sampler else {},
+        "sampled_out": sampler.sampled_out if sampler else 0,
+    }
@@ -0,0 +1,2 @@
+# Standalone benchmark scripts. Run from the project folder, e.g.
+#   python -m benchmarks.bench_encode_input
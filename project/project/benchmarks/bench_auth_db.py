@@ -0,0 +1,120 @@
+"""Signup/login throughput: old per-call sync sessions vs the async pooled data layer.
+
+"sync" reproduces the previous auth path: a new SessionLocal per call on a plain
+sqlite engine (rollback journal, no pragmas), executed through the threadpool
+like a sync FastAPI handler. "async" is the current path: request-scoped
+AsyncSessions from the aiosqlite pool, WAL, and the prebuilt user query.
+
+Password hashing is replaced by a cheap stand-in so only the database layer is
+measured (bcrypt cost is covered separately). Each mode gets its own temporary
+database file.
+
+Run from the project folder:
+    python -m benchmarks.bench_auth_db --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+TMP_DIR = tempfile.mkdtemp(prefix="agrosense-bench-")
+os.environ["DATABASE_PATH"] = os.path.join(TMP_DIR, "async.db")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+
+from app.db.database import AsyncSessionLocal, Base, User, async_engine  # noqa: E402
+from app.services import auth_service  # noqa: E402
+from app.utils.logger import logger  # noqa: E402
+
+logger.setLevel("WARNING")
+
+auth_service.hash_password = lambda password: "x" + password
+auth_service.verify_password = lambda plain, hashed: hashed == "x" + plain
+
+sync_engine = create_engine(f"sqlite:///{os.path.join(TMP_DIR, 'sync.db')}", connect_args={"check_same_thread": False})
+Base.metadata.create_all(bind=sync_engine)
+SyncSession = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+
+
+# ==============================
+# Previous implementation (sync, session per call)
+# ==============================
+def sync_create_user(email, password):
+    db = SyncSession()
+    try:
+        if db.query(User).filter(User.email == email).first():
+            raise ValueError("Email already registered")
+        db.add(User(email=email, password=auth_service.hash_password(password)))
+        db.commit()
+    finally:
+        db.close()
+
+
+def sync_authenticate_user(email, password):
+    db = SyncSession()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        return bool(user) and auth_service.verify_password(password, user.password)
+    finally:
+        db.close()
+
+
+async def sync_signup(email, password):
+    await run_in_threadpool(sync_create_user, email, password)
+
+
+async def sync_login(email, password):
+    return await run_in_threadpool(sync_authenticate_user, email, password)
+
+
+# ==============================
+# Current implementation (async, pooled)
+# ==============================
+async def async_signup(email, password):
+    async with AsyncSessionLocal() as db:
+        await auth_service.create_user(db, email, password)
+
+
+async def async_login(email, password):
+    async with AsyncSessionLocal() as db:
+        return await auth_service.authenticate_user(db, email, password)
+
+
+async def drive(fn, emails, concurrency):
+    queue = list(emails)
+    latencies = []
+
+    async def worker():
+        while queue:
+            email = queue.pop()
+            started = time.perf_counter()
+            await fn(email, "secret")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+async def main(args):
+    print(f"hashing stubbed out; {args.requests} requests per run, temp dir {TMP_DIR}")
+    for mode, signup, login in (("sync", sync_signup, sync_login), ("async", async_signup, async_login)):
+        for concurrency in args.concurrency:
+            emails = [f"{mode}-{concurrency}-{i}@example.com" for i in range(args.requests)]
+            for op, fn in (("signup", signup), ("login", login)):
+                rps, p50, p99 = await drive(fn, emails, concurrency)
+                print(f"[{mode:<5}] {op:<6} c={concurrency:<3} {rps:9,.0f} req/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""Login latency under a burst, and what the burst does to unrelated endpoints.
+
+Modes:
+  inline      bcrypt through the shared threadpool (how sync handlers ran it)
+  pool        bcrypt on the dedicated hashing pool
+
+While each burst runs, a probe submits a trivial task to the shared threadpool
+every 5 ms, standing in for a sync endpoint such as /market. Also compares login
+time for known vs unknown emails, which should match.
+
+Run from the project folder:
+    python -m benchmarks.bench_auth_hashing --users 64 --rounds 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+TMP_DIR = tempfile.mkdtemp(prefix="agrosense-bench-")
+os.environ["DATABASE_PATH"] = os.path.join(TMP_DIR, "auth.db")
+
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+
+from app.db.database import AsyncSessionLocal, User, async_engine  # noqa: E402
+from app.services import auth_service  # noqa: E402
+from app.utils.logger import logger  # noqa: E402
+
+logger.setLevel("WARNING")
+PASSWORD = "correct horse battery staple"
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.99) - 1)]
+
+
+async def inline_login(db, email, password):
+    user = await auth_service.get_user_by_email(db, email)
+    return bool(user) and await run_in_threadpool(auth_service.verify_password, password, user.password)
+
+
+async def burst(login, emails, repeat):
+    latencies, probe = [], []
+    done = asyncio.Event()
+
+    async def one(email):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            assert await login(db, email, PASSWORD)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    async def prober():
+        while not done.is_set():
+            started = time.perf_counter()
+            await run_in_threadpool(sum, ())
+            probe.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.005)
+
+    probe_task = asyncio.create_task(prober())
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await asyncio.gather(*(one(email) for email in emails))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return len(latencies) / elapsed, percentiles(latencies), percentiles(probe)
+
+
+async def main(args):
+    auth_service.BCRYPT_ROUNDS = args.rounds
+    # Unknown emails must cost the same as known ones at this cost factor
+    auth_service._dummy_hash = auth_service.hash_password("agrosense-dummy-password")
+    emails = [f"user{i}@example.com" for i in range(args.users)]
+    hashed = auth_service.hash_password(PASSWORD)
+    async with AsyncSessionLocal() as db:
+        db.add_all(User(email=email, password=hashed) for email in emails)
+        await db.commit()
+
+    print(f"{args.users} concurrent logins x{args.repeat}, bcrypt cost {args.rounds}, "
+          f"hashing pool workers {auth_service.hashing_pool.workers}")
+    print(f"{'mode':<11} {'logins/s':>9} {'login p50':>10} {'p99':>9} {'probe p50':>10} {'p99':>9}")
+    for mode, login in (("inline", inline_login), ("pool", auth_service.authenticate_user)):
+        rps, (p50, p99), (probe50, probe99) = await burst(login, emails, args.repeat)
+        print(f"{mode:<11} {rps:9,.0f} {p50:8.1f}ms {p99:7.1f}ms {probe50:8.2f}ms {probe99:7.2f}ms")
+
+    # Timing of known vs unknown emails, one at a time
+    timings = {"known": [], "unknown": []}
+    async with AsyncSessionLocal() as db:
+        for i in range(args.samples):
+            for kind, email in (("known", emails[i % len(emails)]), ("unknown", f"nobody{i}@example.com")):
+                started = time.perf_counter()
+                await auth_service.authenticate_user(db, email, PASSWORD)
+                timings[kind].append((time.perf_counter() - started) * 1000)
+    for kind, samples in timings.items():
+        p50, p99 = percentiles(samples)
+        print(f"{kind:<8} email login: p50 {p50:6.1f} ms  p99 {p99:6.1f} ms")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=30)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""CPU latency and memory: ResNet50 (current image path) vs the disease classifier.
+
+Variants, each measured in a fresh interpreter so RSS numbers don't mix:
+  resnet50             torchvision ResNet50, fp32 eager (image_service path)
+  mobilenet_v3 fp32    MobileNetV3-small with the disease head, eager
+  mobilenet_v3 int8    the same, exported by export_disease_model.py
+                       (TorchScript, int8 dynamic quantization)
+
+Weights are untrained: latency and memory don't depend on their values.
+
+Run from the project folder:
+    python -m benchmarks.bench_disease_model --batch-sizes 1 8 16 --iters 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import json, sys, time
+import torch
+from app.services.model_registry import rss_mb
+
+variant, batch_sizes, iters, path = sys.argv[1], json.loads(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+base_rss = rss_mb()
+started = time.perf_counter()
+if variant == "resnet50":
+    from torchvision import models
+    model = models.resnet50(weights=None).eval()
+elif variant == "mobilenet_v3 fp32":
+    from export_disease_model import build_model
+    model = build_model("mobilenet_v3_small", 38)
+else:
+    model = torch.jit.load(path, map_location="cpu").eval()
+load_ms = (time.perf_counter() - started) * 1000
+load_rss = rss_mb() - base_rss
+
+latency = {}
+with torch.no_grad():
+    for batch_size in batch_sizes:
+        batch = torch.randn(batch_size, 3, 224, 224)
+        model(batch)   # warm-up
+        started = time.perf_counter()
+        for _ in range(iters):
+            model(batch)
+        latency[batch_size] = (time.perf_counter() - started) / iters * 1000
+print(json.dumps({"load_ms": load_ms, "load_rss_mb": load_rss, "peak_rss_mb": rss_mb() - base_rss, "latency_ms": latency}))
+"""
+
+VARIANTS = ["resnet50", "mobilenet_v3 fp32", "mobilenet_v3 int8"]
+
+
+def main(args):
+    from export_disease_model import build_model, export
+
+    path = os.path.join(tempfile.mkdtemp(prefix="agrosense-bench-"), "disease_int8.pt")
+    export(build_model("mobilenet_v3_small", 38), path)
+    print(f"int8 TorchScript file: {os.path.getsize(path) / 2**20:.1f} MB; {os.cpu_count()} CPU(s)")
+
+    header = "".join(f"{f'bs={b} ms/img':>14}" for b in args.batch_sizes)
+    print(f"{'variant':<20}{'load ms':>9}{'load MB':>9}{'peak MB':>9}{header}")
+    for variant in VARIANTS:
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD, variant, json.dumps(args.batch_sizes), str(args.iters), path],
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        per_image = "".join(f"{result['latency_ms'][str(b)] / b:14.1f}" for b in args.batch_sizes)
+        print(f"{variant:<20}{result['load_ms']:9.0f}{result['load_rss_mb']:9.1f}{result['peak_rss_mb']:9.1f}{per_image}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16])
+    parser.add_argument("--iters", type=int, default=10)
+    main(parser.parse_args())
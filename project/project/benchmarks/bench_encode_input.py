@@ -0,0 +1,52 @@
+"""Per-call cost of category encoding: list scan vs precomputed dict index.
+
+Run from the project folder:
+    python -m benchmarks.bench_encode_input
+"""
+import timeit
+
+from app.services.encoding import build_category_index, encode_input
+
+# Roughly the size of the real artifacts (crops x states)
+CROPS = [f"Crop{i}" for i in range(60)] + ["Rice", "Wheat", "Sugarcane"]
+STATES = [f"State {i}" for i in range(33)] + ["Maharashtra", "Uttar Pradesh", "West Bengal"]
+CATEGORIES = {"Crop": CROPS, "State": STATES}
+
+# What the request handlers send in practice: lower-case, needs normalizing
+SAMPLES = [("sugarcane", "west bengal"), ("rice", "maharashtra"), ("wheat", "uttar pradesh")]
+
+
+def legacy_encode_input(value, column, encoders):
+    # Previous implementation from app/main.py
+    if value not in encoders[column]:
+        raise ValueError(f"Unknown category '{value}' for column '{column}'")
+    return encoders[column].index(value)
+
+
+def legacy_call():
+    for crop, state in SAMPLES:
+        legacy_encode_input(crop.capitalize(), "Crop", CATEGORIES)
+        legacy_encode_input(state.title(), "State", CATEGORIES)
+
+
+INDEX = build_category_index(CATEGORIES)
+
+
+def indexed_call():
+    for crop, state in SAMPLES:
+        encode_input(crop, "Crop", INDEX)
+        encode_input(state, "State", INDEX)
+
+
+def bench(fn, number=200_000):
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    # ns per single crop+state encode
+    return best / (number * len(SAMPLES)) * 1e9
+
+
+if __name__ == "__main__":
+    before = bench(legacy_call)
+    after = bench(indexed_call)
+    print(f"list.index + normalize : {before:8.1f} ns/call")
+    print(f"dict index             : {after:8.1f} ns/call")
+    print(f"speedup                : {before / after:8.2f}x")
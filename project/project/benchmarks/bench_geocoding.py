@@ -0,0 +1,88 @@
+"""Lookups per second of the local state-boundary index and the quantized cache.
+
+Uses app/data/india_states.geojson when present (bundled and simplified;
+download_state_boundaries.py fetches the full-resolution file), otherwise a
+synthetic 6x6 tiling of India's bounding box with wiggly, shared borders of
+similar vertex counts.
+
+Run from the project folder:
+    python -m benchmarks.bench_geocoding --points 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("GEOCODE_REMOTE_FALLBACK", "false")
+
+from app.services import geocoding  # noqa: E402
+from app.services.geocoding import StateIndex  # noqa: E402
+
+LON0, LON1, LAT0, LAT1 = 68.0, 97.5, 8.0, 37.0
+
+
+def synthetic_features(n=6, points_per_edge=400):
+    xs, ys = np.linspace(LON0, LON1, n + 1), np.linspace(LAT0, LAT1, n + 1)
+    dx, dy = xs[1] - xs[0], ys[1] - ys[0]
+
+    def vertical(i, y_from, y_to):
+        y = np.linspace(y_from, y_to, points_per_edge)
+        return np.c_[xs[i] + 0.15 * np.sin(np.pi * 7 * (y - LAT0) / dy), y]
+
+    def horizontal(j, x_from, x_to):
+        x = np.linspace(x_from, x_to, points_per_edge)
+        return np.c_[x, ys[j] + 0.15 * np.sin(np.pi * 7 * (x - LON0) / dx)]
+
+    features = []
+    for i in range(n):
+        for j in range(n):
+            ring = np.concatenate([
+                horizontal(j, xs[i], xs[i + 1]),
+                vertical(i + 1, ys[j], ys[j + 1]),
+                horizontal(j + 1, xs[i + 1], xs[i]),
+                vertical(i, ys[j + 1], ys[j]),
+            ])
+            features.append({
+                "properties": {"name": f"State {i}-{j}"},
+                "geometry": {"type": "Polygon", "coordinates": [ring.tolist()]},
+            })
+    return features
+
+
+def main(args):
+    started = time.perf_counter()
+    if os.path.exists(geocoding.STATE_BOUNDARIES_PATH):
+        index, source = StateIndex.from_geojson(geocoding.STATE_BOUNDARIES_PATH), geocoding.STATE_BOUNDARIES_PATH
+    else:
+        index, source = StateIndex(synthetic_features()), "synthetic tiling"
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"index: {source}, {len(index.parts)} polygons, {len(index.grid)} cells, built in {build_ms:.1f} ms")
+
+    rng = np.random.default_rng(0)
+    points = np.c_[rng.uniform(LAT0, LAT1, args.points), rng.uniform(LON0, LON1, args.points)].tolist()
+
+    started = time.perf_counter()
+    found = sum(index.lookup(lat, lon) is not None for lat, lon in points)
+    elapsed = time.perf_counter() - started
+    print(f"index lookups   : {len(points) / elapsed:12,.0f} /s  ({found}/{len(points)} resolved)")
+
+    # Cached path: the same points again through lookup_state
+    geocoding._index, geocoding._index_loaded = index, True
+
+    async def run():
+        for lat, lon in points:
+            await geocoding.lookup_state(lat, lon)
+
+    asyncio.run(run())  # warm the cache
+    started = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    print(f"cached lookups  : {len(points) / elapsed:12,.0f} /s  (hit rate {geocoding.state_cache.stats()['hit_rate']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=20000)
+    main(parser.parse_args())
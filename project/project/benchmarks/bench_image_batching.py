@@ -0,0 +1,69 @@
+"""Throughput of ResNet50 classification: per-request forward vs micro-batching.
+
+Uses randomly initialised weights (no download) on CPU; the forward-pass cost is
+the same as with the pretrained weights.
+
+Run from the project folder:
+    python -m benchmarks.bench_image_batching --requests 64
+"""
+import argparse
+import asyncio
+import time
+
+import torch
+from torchvision import models
+
+from app.services.batching import MicroBatcher
+
+CONCURRENCY = (1, 8, 32)
+
+
+def build_model():
+    model = models.resnet50(weights=None)
+    model.eval()
+    return model
+
+
+async def run_clients(handler, n_requests, concurrency, sample):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def client():
+        async with semaphore:
+            await handler(sample)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(n_requests)))
+    return n_requests / (time.perf_counter() - start)
+
+
+async def main(args):
+    model = build_model()
+    sample = torch.rand(3, 224, 224)
+
+    # Previous behaviour: a batch-1 forward pass inline in the coroutine
+    async def per_request(x):
+        with torch.no_grad():
+            return model(x.unsqueeze(0)).argmax(1).item()
+
+    def forward_batch(tensors):
+        with torch.no_grad():
+            return model(torch.stack(tensors)).argmax(1).tolist()
+
+    print(f"{'clients':>8} {'per-request img/s':>18} {'batched img/s':>14} {'speedup':>8}")
+    for concurrency in CONCURRENCY:
+        batcher = MicroBatcher(forward_batch, max_batch_size=args.max_batch_size,
+                               max_wait_ms=args.max_wait_ms, name="bench")
+        baseline = await run_clients(per_request, args.requests, concurrency, sample)
+        batched = await run_clients(batcher.submit, args.requests, concurrency, sample)
+        print(f"{concurrency:>8} {baseline:>18.2f} {batched:>14.2f} {batched / baseline:>7.2f}x")
+        if args.verbose:
+            print("   ", batcher.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--verbose", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,49 @@
+"""Per-request cost of bearer-token verification: jwt.decode vs the claims cache.
+
+Run from the project folder:
+    python -m benchmarks.bench_jwt --tokens 1000 --rounds 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+# auth_service imports the database module, which opens DATABASE_PATH
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="agrosense-bench-"), "jwt.db")
+
+from jose import jwt  # noqa: E402
+
+from app.services import token_service  # noqa: E402
+from app.services.auth_service import create_access_token  # noqa: E402
+
+
+def timed(fn, tokens, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for token in tokens:
+            fn(token)
+    return (time.perf_counter() - started) / (rounds * len(tokens)) * 1e6
+
+
+def main(args):
+    tokens = [create_access_token({"sub": f"user{i}@example.com"}) for i in range(args.tokens)]
+    secret = token_service.keyring.keys[token_service.keyring.active]
+
+    decode_us = timed(lambda t: jwt.decode(t, secret, algorithms=[token_service.ALGORITHM]), tokens, args.rounds)
+    token_service.token_cache.clear()
+    timed(token_service.verify_token, tokens, 1)   # first sight: verify and cache
+    cached_us = timed(token_service.verify_token, tokens, args.rounds)
+
+    print(f"{args.tokens} distinct tokens x{args.rounds}")
+    print(f"jwt.decode every request : {decode_us:8.2f} us")
+    print(f"verify_token (cached)    : {cached_us:8.2f} us  ({decode_us / cached_us:.0f}x faster)")
+    stats = token_service.token_stats()
+    print(f"stats: decoded={stats['decoded']} cache_hits={stats['cache_hits']} "
+          f"avg_decode_us={stats['avg_decode_us']} avg_cached_us={stats['avg_cached_us']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    main(parser.parse_args())
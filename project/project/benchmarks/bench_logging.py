@@ -0,0 +1,119 @@
+"""Request latency with INFO logging under load: direct handlers vs the queued logger.
+
+Worker threads call calc_market (one INFO record per call, as /market/profit
+does) as fast as they can. Three setups of the AgroSense logger:
+
+    direct   console + rotating file handlers on the logger (the old setup)
+    drop     bounded queue + listener thread, full queue drops records
+    block    bounded queue + listener thread, full queue waits for space
+
+The console goes to /dev/null and the file to a temp dir. --stall-ms makes
+every --stall-every'th file write sleep, standing in for a slow disk, fsync
+or a rotation.
+
+Run from the project folder:
+    python -m benchmarks.bench_logging --threads 16 --calls 2000 --stall-ms 20
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from app.services.market_service import calc_market
+from app.utils.logger import BoundedQueueHandler, attach_queue, build_handlers, logger, parse_sample_rates
+
+
+def stalling(handler, stall_ms, every):
+    emit = handler.emit
+    count = [0]
+
+    def slow_emit(record):
+        count[0] += 1
+        if stall_ms and count[0] % every == 0:
+            time.sleep(stall_ms / 1000)
+        emit(record)
+
+    handler.emit = slow_emit
+    return handler
+
+
+def run_load(threads, calls):
+    latencies = np.empty((threads, calls))
+    barrier = threading.Barrier(threads)
+
+    def worker(t):
+        rng = np.random.default_rng(t)
+        inputs = rng.uniform(1, 100, (calls, 4)).tolist()
+        barrier.wait()
+        for i, (supply, demand, cost, price) in enumerate(inputs):
+            started = time.perf_counter()
+            calc_market(supply, demand, cost, price)
+            latencies[t, i] = time.perf_counter() - started
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return latencies.ravel() * 1e6, time.perf_counter() - started
+
+
+def bench(mode, args, log_dir):
+    handlers = build_handlers(os.path.join(log_dir, f"{mode}.log"), args.format)
+    handlers[0].setStream(open(os.devnull, "w"))
+    stalling(handlers[1], args.stall_ms, args.stall_every)
+    listener = None
+    if mode == "direct":
+        for handler in handlers:
+            logger.addHandler(handler)
+    else:
+        queue_handler, listener = attach_queue(logger, handlers, args.queue_size, mode,
+                                               parse_sample_rates(args.sample))
+    try:
+        latencies, elapsed = run_load(args.threads, args.calls)
+    finally:
+        drain_started = time.perf_counter()
+        if listener:
+            listener.stop()
+        drain_s = time.perf_counter() - drain_started
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        for handler in handlers:
+            handler.close()
+    p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9])
+    line = (f"{mode:6s}  {len(latencies) / elapsed:9.0f} calls/s  p50 {p50:7.1f} us  p99 {p99:8.1f} us  "
+            f"p99.9 {p999:8.1f} us  max {latencies.max() / 1000:7.1f} ms")
+    if listener:
+        line += f"  dropped {queue_handler.dropped}  drain {drain_s * 1000:.0f} ms"
+    print(line)
+
+
+def main(args):
+    # Detach the app's own queue handler; each setup below installs its own
+    for handler in list(logger.handlers):
+        if isinstance(handler, BoundedQueueHandler):
+            logger.removeHandler(handler)
+    logger.setLevel(logging.INFO)
+    print(f"{args.threads} threads x {args.calls} calls, format {args.format}, queue {args.queue_size}, "
+          f"stall {args.stall_ms} ms every {args.stall_every} writes, sample {args.sample or 'off'}")
+    with tempfile.TemporaryDirectory() as log_dir:
+        for mode in args.modes:
+            bench(mode, args, log_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--format", choices=["json", "text"], default="json")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--stall-ms", type=float, default=0.0)
+    parser.add_argument("--stall-every", type=int, default=1000)
+    parser.add_argument("--sample", default="", help='e.g. "INFO=0.1"')
+    parser.add_argument("--modes", nargs="+", choices=["direct", "drop", "block"], default=["direct", "drop", "block"])
+    main(parser.parse_args())
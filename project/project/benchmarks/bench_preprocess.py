@@ -0,0 +1,75 @@
+"""Image preprocessing only: full decode + torchvision transforms vs draft decode + batch buffer.
+
+The corpus is synthetic 12 MP (4032x3024) phone-style JPEGs: smooth gradients
+plus sensor-like noise so they compress like real photos. Both paths produce a
+normalized (N, 3, 224, 224) batch; the benchmark also reports how far the
+draft-decoded batch drifts from the reference.
+
+Run from the project folder:
+    python -m benchmarks.bench_preprocess --images 16 --batch-size 8
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+from torchvision import transforms
+
+from app.services.image_preprocess import batch_buffers, decode_image
+
+reference = transforms.Compose([
+    transforms.Resize(256),
+    transforms.CenterCrop(224),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+])
+
+
+def synthetic_jpeg(rng, width=4032, height=3024):
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    phase = rng.uniform(0, 2 * np.pi, 3)
+    channels = [127 + 80 * np.sin(x / (300 + 97 * c) + y / (410 + 53 * c) + phase[c]) for c in range(3)]
+    pixels = np.stack(channels, axis=-1) + rng.normal(0, 6, (height, width, 3))
+    buf = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def old_path(blobs):
+    return torch.stack([reference(Image.open(io.BytesIO(b)).convert("RGB")) for b in blobs])
+
+
+def new_path(blobs):
+    return batch_buffers.to_tensor([decode_image(b) for b in blobs])
+
+
+def timed(fn, corpus, batch_size):
+    started = time.perf_counter()
+    for i in range(0, len(corpus), batch_size):
+        fn(corpus[i:i + batch_size])
+    return (time.perf_counter() - started) / len(corpus) * 1000
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    corpus = [synthetic_jpeg(rng) for _ in range(args.images)]
+    print(f"{len(corpus)} images, 4032x3024, avg {np.mean([len(b) for b in corpus]) / 2**20:.1f} MB each, "
+          f"batch size {args.batch_size}")
+
+    old_ms = timed(old_path, corpus, args.batch_size)
+    new_ms = timed(new_path, corpus, args.batch_size)
+    print(f"full decode + transforms : {old_ms:8.1f} ms/img")
+    print(f"draft decode + buffer    : {new_ms:8.1f} ms/img  ({old_ms / new_ms:.1f}x faster)")
+
+    sample = corpus[:args.batch_size]
+    drift = (old_path(sample) - new_path(sample)).abs()
+    print(f"drift vs reference (normalized units): mean {drift.mean():.4f}, max {drift.max():.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=8)
+    main(parser.parse_args())
@@ -0,0 +1,58 @@
+"""Cold-start time of the app: lazy vs eager (parallel) model loading.
+
+Each mode runs in a fresh interpreter. Reports the time to `import app.main`,
+the time until every registered model has finished loading (eager only, or
+after forcing all loads in lazy mode), and RSS at both points.
+
+Run from the project folder:
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import json, time
+started = time.perf_counter()
+import app.main as main
+from app.services.model_registry import registry, rss_mb, READY, FAILED
+imported = time.perf_counter()
+import_rss = rss_mb()
+
+if main.MODEL_LOADING == "eager":
+    registry.preload(background=False)
+else:
+    for name in registry.status()["models"]:
+        try:
+            registry.get(name)
+        except Exception:
+            pass
+done = time.perf_counter()
+status = registry.status()
+print(json.dumps({
+    "import_s": round(imported - started, 3),
+    "import_rss_mb": round(import_rss, 1),
+    "all_models_s": round(done - started, 3),
+    "all_models_rss_mb": status["memory"]["rss_mb"],
+    "models": {name: {k: m[k] for k in ("state", "load_ms", "rss_delta_mb")} for name, m in status["models"].items()},
+}))
+"""
+
+
+def run(mode):
+    # A scratch database: importing the app would otherwise open the tracked one
+    database = os.path.join(tempfile.mkdtemp(prefix="agrosense-bench-"), "startup.db")
+    env = {**os.environ, "MODEL_LOADING": mode, "DATABASE_PATH": database}
+    out = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    for mode in ("lazy", "eager"):
+        result = run(mode)
+        print(f"[{mode}] import: {result['import_s']:.2f}s ({result['import_rss_mb']} MB)  "
+              f"all models: {result['all_models_s']:.2f}s ({result['all_models_rss_mb']} MB)")
+        for name, model in result["models"].items():
+            print(f"    {name:<10} {model['state']:<10} {model['load_ms']} ms  +{model['rss_delta_mb']} MB")
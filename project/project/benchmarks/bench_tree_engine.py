@@ -0,0 +1,96 @@
+"""Tabular model latency: sklearn on a DataFrame vs the compiled tree engine.
+
+By default a stand-in for the yield model is trained: a RandomForestRegressor
+with two outputs on (Crop, State, Fertilizer) codes. Pass --model to time a
+real artifact instead (e.g. models/Yield_model.pkl; the estimator is the
+artifact entry ending in "_model").
+
+For each batch size the benchmark times
+    sklearn   pd.DataFrame(rows) -> model.predict   (the previous request path)
+    compiled  CompiledTrees.predict(rows)
+and checks that both give identical outputs.
+
+Run from the project folder:
+    python -m benchmarks.bench_tree_engine --trees 100 --batch-sizes 1 16 256 10000
+"""
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.services.tree_engine import compile_model
+
+COLUMNS = ["Crop", "State", "Fertilizer"]
+
+
+def stand_in_model(args, rng):
+    from sklearn.ensemble import RandomForestRegressor
+
+    n = args.train_rows
+    crop, state = rng.integers(0, 50, n), rng.integers(0, 30, n)
+    fertilizer = rng.uniform(0, 250, n)
+    yield_per_ha = 1 + (crop % 7) * 0.6 + (state % 5) * 0.3 + np.sqrt(fertilizer) * 0.1 + rng.normal(0, 0.3, n)
+    optimum = 80 + (crop % 11) * 12 + rng.normal(0, 5, n)
+    X = pd.DataFrame({"Crop": crop, "State": state, "Fertilizer": fertilizer})
+    return RandomForestRegressor(args.trees, random_state=0).fit(X, np.c_[yield_per_ha, optimum])
+
+
+def load_model(path):
+    artifacts = joblib.load(path)
+    return next(value for key, value in artifacts.items() if key.endswith("_model"))
+
+
+def request_rows(model, n, rng):
+    """Random valid-looking inputs: integer codes plus a continuous last column."""
+    columns = list(getattr(model, "feature_names_in_", COLUMNS))
+    rows = rng.integers(0, 30, (n, len(columns))).astype(float)
+    rows[:, -1] = rng.uniform(0, 250, n) if len(columns) == 3 else rows[:, -1]
+    return rows, columns
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    started = time.perf_counter()
+    model = load_model(args.model) if args.model else stand_in_model(args, rng)
+    print(f"model: {type(model).__name__} ({getattr(model, 'n_estimators', 1)} trees), "
+          f"ready in {time.perf_counter() - started:.1f} s")
+
+    rows, columns = request_rows(model, max(args.batch_sizes), rng)
+    started = time.perf_counter()
+    compiled = compile_model(model, columns)
+    if compiled is None:
+        print("model could not be compiled (unsupported, or failed the parity probe)")
+        return
+    print(f"compiled in {time.perf_counter() - started:.2f} s: {len(compiled.threshold)} nodes, "
+          f"{(compiled.threshold.nbytes + compiled.children.nbytes + compiled.feature.nbytes) / 2**20:.0f} MB "
+          f"of node arrays")
+
+    print(f"{'rows':>6}  {'sklearn':>12}  {'compiled':>12}  {'speedup':>8}  parity")
+    for n in args.batch_sizes:
+        batch = rows[:n]
+        repeat = max(3, min(200, 2000 // n))
+        sklearn_s = best_of(lambda: model.predict(pd.DataFrame(batch, columns=columns)), repeat)
+        compiled_s = best_of(lambda: compiled.predict(batch), repeat)
+        same = np.array_equal(model.predict(pd.DataFrame(batch, columns=columns)), compiled.predict(batch))
+        print(f"{n:>6}  {sklearn_s * 1000:>9.3f} ms  {compiled_s * 1000:>9.3f} ms  "
+              f"{sklearn_s / compiled_s:>7.1f}x  {'identical' if same else 'DIFFERENT'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", help="joblib artifact to time instead of the stand-in")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 256, 1000, 10000])
+    main(parser.parse_args())
@@ -0,0 +1,206 @@
+"""Whisper on CPU: real-time factor and word-error-rate drift per speech-engine option.
+
+Each variant is a SpeechConfig (app/services/speech_engine.py) on top of the
+baseline (--model, fp32, language detection, greedy with temperature fallback):
+
+    baseline     plain whisper.load_model + transcribe()
+    int8         dynamic int8 quantization of the Linear layers
+    pinned       language pinned (to each sample's language) instead of detected
+    beam         beam search (--beam-size)
+    no-fallback  one decode per segment, no temperature fallback
+    short-tiny   clips up to --short-clip-s seconds go to "tiny"
+    fast         int8 + pinned + no-fallback + short-tiny
+
+Samples are the short commands and longer voice notes in English, Hindi and
+Marathi listed in benchmarks/data/speech_samples.json. Their audio, synthesized
+with espeak-ng at 150 words per minute, is checked in as
+benchmarks/data/speech_samples/<id>.wav. Samples without a WAV in --audio-dir
+are synthesized there with espeak-ng; point --audio-dir at recordings named
+<id>.wav to use real speech instead. Synthetic speech is harder than real
+speech for Whisper, so absolute WER is pessimistic; "drift" (WER of a variant's
+transcripts against the baseline's) shows what an option changes.
+
+RTF = processing time / audio duration (below 1 is faster than real time),
+after one untimed warm-up per model. Needs openai-whisper and downloads the
+model weights on first use.
+
+Run from the project folder:
+    python -m benchmarks.bench_whisper --model base --variants baseline int8 pinned short-tiny fast
+"""
+import argparse
+import json
+import os
+import subprocess
+import time
+import unicodedata
+
+from app.services.audio_decoding import SAMPLE_RATE, DecodeStats, decode_audio
+from app.services.model_registry import rss_mb
+from app.services.speech_engine import SpeechConfig, load_whisper_model
+
+SAMPLES_PATH = os.path.join(os.path.dirname(__file__), "data", "speech_samples.json")
+AUDIO_DIR = os.path.join(os.path.dirname(__file__), "data", "speech_samples")
+ESPEAK_VOICES = {"en": "en-us", "hi": "hi", "mr": "mr"}
+
+# name -> (SpeechConfig overrides, pin each sample's language)
+VARIANTS = {
+    "baseline": ({}, False),
+    "int8": ({"quantize": "int8"}, False),
+    "pinned": ({}, True),
+    "beam": ({"decode": "beam"}, False),
+    "no-fallback": ({"fallback": False}, False),
+    "short-tiny": ({"short_model": "tiny"}, False),
+    "fast": ({"quantize": "int8", "fallback": False, "short_model": "tiny"}, True),
+}
+
+
+def load_samples(audio_dir, rate):
+    with open(SAMPLES_PATH, encoding="utf-8") as f:
+        samples = json.load(f)["samples"]
+    os.makedirs(audio_dir, exist_ok=True)
+    for sample in samples:
+        path = os.path.join(audio_dir, f"{sample['id']}.wav")
+        if not os.path.exists(path):
+            cmd = ["espeak-ng", "-v", ESPEAK_VOICES[sample["language"]], "-s", str(rate), "-w", path, sample["text"]]
+            try:
+                subprocess.run(cmd, check=True, capture_output=True)
+            except FileNotFoundError:
+                raise SystemExit(f"espeak-ng not found: install it, or put {sample['id']}.wav etc. in {audio_dir}")
+        with open(path, "rb") as f:
+            sample["audio"], _ = decode_audio(f.read(), ".wav", DecodeStats())
+        sample["seconds"] = len(sample["audio"]) / SAMPLE_RATE
+    return samples
+
+
+def words(text):
+    # Case and punctuation (including the Devanagari danda) don't count as errors
+    text = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in text.casefold())
+    return text.split()
+
+
+def edit_distance(ref, hyp):
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (r != h))
+    return row[-1]
+
+
+def wer(pairs):
+    """Corpus WER over (reference, hypothesis) text pairs."""
+    errors = total = 0
+    for ref, hyp in pairs:
+        ref_words = words(ref)
+        errors += edit_distance(ref_words, words(hyp))
+        total += len(ref_words)
+    return errors / total if total else 0.0
+
+
+class Models:
+    """Loads each (size, quantization) once and remembers load time and memory."""
+
+    def __init__(self):
+        self.models, self.loads = {}, {}
+
+    def get(self, size, quantize):
+        key = (size, quantize)
+        if key not in self.models:
+            before, started = rss_mb(), time.perf_counter()
+            self.models[key] = load_whisper_model(size, quantize)
+            self.loads[key] = (time.perf_counter() - started, rss_mb() - before)
+            print(f"  loaded {size} ({quantize}) in {self.loads[key][0]:.1f} s, +{self.loads[key][1]:.0f} MB RSS")
+        return self.models[key]
+
+
+def run_variant(config, pin, samples, models):
+    warmed = set()
+    results = []
+    for sample in samples:
+        size = config.model_for(sample["seconds"])
+        model = models.get(size, config.quantize)
+        options = config.transcribe_options(language=sample["language"] if pin else None)
+        if size not in warmed:
+            model.transcribe(samples[0]["audio"], **options)
+            warmed.add(size)
+        started = time.perf_counter()
+        result = model.transcribe(sample["audio"], **options)
+        results.append({
+            "id": sample["id"], "model": size, "seconds": round(sample["seconds"], 2),
+            "elapsed_s": round(time.perf_counter() - started, 3),
+            "language": result.get("language"), "text": result["text"].strip(),
+        })
+    return results
+
+
+def summarize(name, results, samples, baseline, short_clip_s):
+    by_id = {s["id"]: s for s in samples}
+
+    def rtf(rows):
+        return sum(r["elapsed_s"] for r in rows) / sum(r["seconds"] for r in rows) if rows else float("nan")
+
+    summary = {
+        "variant": name,
+        "rtf": rtf(results),
+        "rtf_short": rtf([r for r in results if r["seconds"] <= short_clip_s]),
+        "rtf_long": rtf([r for r in results if r["seconds"] > short_clip_s]),
+        "language_ok": sum(r["language"] == by_id[r["id"]]["language"] for r in results),
+    }
+    for language in ESPEAK_VOICES:
+        summary[f"wer_{language}"] = wer([(by_id[r["id"]]["text"], r["text"]) for r in results
+                                         if by_id[r["id"]]["language"] == language])
+    if baseline is not None:
+        reference = {r["id"]: r["text"] for r in baseline}
+        summary["drift"] = wer([(reference[r["id"]], r["text"]) for r in results])
+    return summary
+
+
+def main(args):
+    samples = load_samples(args.audio_dir, args.espeak_rate)
+    total_s = sum(s["seconds"] for s in samples)
+    print(f"{len(samples)} samples, {total_s:.0f} s of audio, "
+          f"{sum(s['seconds'] <= args.short_clip_s for s in samples)} of them <= {args.short_clip_s:g} s")
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    models, summaries, report = Models(), [], {}
+    baseline = None
+    for name in args.variants:
+        overrides, pin = VARIANTS[name]
+        settings = dict(model=args.model, short_model="", short_clip_s=args.short_clip_s, quantize="none",
+                        language="", decode="greedy", beam_size=args.beam_size, fallback=True)
+        settings.update(overrides)
+        config = SpeechConfig(**settings)
+        print(f"{name}: {config.version()}{' (language pinned per sample)' if pin else ''}")
+        results = run_variant(config, pin, samples, models)
+        if name == "baseline":
+            baseline = results
+        summaries.append(summarize(name, results, samples, baseline, args.short_clip_s))
+        report[name] = {"config": config.version(), "pinned": pin, "results": results}
+
+    print(f"\n{'variant':<12} {'RTF':>6} {'short':>6} {'long':>6}   {'WER en':>6} {'hi':>6} {'mr':>6}   "
+          f"{'drift':>6}  lang ok")
+    for s in summaries:
+        drift = f"{s['drift']:6.1%}" if "drift" in s else f"{'-':>6}"
+        print(f"{s['variant']:<12} {s['rtf']:6.3f} {s['rtf_short']:6.3f} {s['rtf_long']:6.3f}   "
+              f"{s['wer_en']:6.1%} {s['wer_hi']:6.1%} {s['wer_mr']:6.1%}   {drift}  {s['language_ok']}/{len(samples)}")
+
+    if args.json:
+        loads = {f"{size}:{quantize}": {"load_s": round(load_s, 2), "rss_delta_mb": round(mb, 1)}
+                 for (size, quantize), (load_s, mb) in models.loads.items()}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"summaries": summaries, "loads": loads, "variants": report}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="base", help="model size of the baseline")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--short-clip-s", type=float, default=8.0)
+    parser.add_argument("--audio-dir", default=AUDIO_DIR)
+    parser.add_argument("--espeak-rate", type=int, default=150, help="words per minute of the synthetic speech")
+    parser.add_argument("--threads", type=int, help="torch CPU threads (default: torch's choice)")
+    parser.add_argument("--json", help="also write per-sample transcripts and timings here")
+    main(parser.parse_args())
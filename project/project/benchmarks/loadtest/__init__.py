@@ -0,0 +1,3 @@
+# Load test of the app's main routes with stand-in models, see __main__.py:
+#   python -m benchmarks.loadtest --out run.json
+#   python -m benchmarks.loadtest.compare before.json after.json
@@ -0,0 +1,238 @@
+"""Load test: every main route of the app, served in-process with stand-in models.
+
+The app runs under uvicorn on a local port in a background thread, with the
+stand-ins from benchmarks/loadtest/standins.py (synthetic sklearn forests, a
+tiny CNN for ResNet50, a fake Whisper, rectangle state boundaries and a local
+Nominatim stub), so no network access or model weights are needed. Each route
+is then driven in turn by --concurrency closed-loop clients: a warm-up, then
+--duration seconds (or --requests requests).
+
+Per route the report has requests, errors (non-200 or an {"error": ...}
+body), status counts, RPS, mean/p50/p95/p99/max latency and the peak RSS seen
+while the route was under load; plus startup time and the process's peak RSS.
+The JSON goes to --out (or stdout), a summary table to stderr. The load
+generator shares the process with the server, so absolute numbers include
+its overhead: compare runs on the same machine, e.g. two commits with
+    python -m benchmarks.loadtest.compare before.json after.json
+
+Run from the project folder:
+    python -m benchmarks.loadtest --concurrency 8 --duration 10 --out after.json
+    python -m benchmarks.loadtest --routes predict-yield get-state --requests 2000
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.loadtest import standins
+from benchmarks.loadtest.scenarios import SCENARIOS
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return {"commit": commit, "dirty": bool(dirty)}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class RssSampler:
+    """Highest RSS seen while the block runs, sampled every `interval_s`."""
+
+    def __init__(self, interval_s=0.01):
+        from app.services.model_registry import rss_mb
+
+        self.rss_mb = rss_mb
+        self.interval_s = interval_s
+        self.peak = 0.0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.rss_mb())
+            self._stop.wait(self.interval_s)
+
+    def __enter__(self):
+        self.start = self.rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.rss_mb())
+
+
+def start_server(app):
+    import uvicorn
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                           access_log=False, lifespan="on"))
+    # Signal handlers are only installed on the main thread, so Ctrl-C still reaches the load generator
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def drive(client, scenario, concurrency, seed, duration_s=None, requests=None):
+    """Closed-loop clients until the deadline / request budget; returns per-request records."""
+    latencies, statuses, failed = [], {}, 0
+    issued = 0
+    deadline = time.perf_counter() + duration_s if duration_s else None
+
+    def more():
+        nonlocal issued
+        if requests is not None:
+            issued += 1
+            return issued <= requests
+        return time.perf_counter() < deadline
+
+    async def worker(i):
+        nonlocal failed
+        rng = np.random.default_rng([seed, i])
+        while more():
+            kwargs = scenario.request(rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, scenario.path, **kwargs)
+                status = str(response.status_code)
+                ok = scenario.ok(response)
+            except Exception as e:
+                status, ok = type(e).__name__, False
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            failed += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return np.asarray(latencies), statuses, failed, time.perf_counter() - started
+
+
+def summarize(latencies, statuses, failed, elapsed):
+    ms = latencies * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (0.0, 0.0, 0.0)
+    return {
+        "requests": len(ms),
+        "errors": failed,
+        "status": dict(sorted(statuses.items())),
+        "duration_s": round(elapsed, 3),
+        "rps": round(len(ms) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(float(ms.mean()), 3) if len(ms) else 0.0,
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(ms.max()), 3) if len(ms) else 0.0,
+        },
+    }
+
+
+async def run_routes(base_url, args):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        for name in args.routes:
+            scenario = SCENARIOS[name]()
+            await scenario.setup(client)
+            # Warm-up: first-use model loads, pool start-up, connection set-up
+            await drive(client, scenario, args.concurrency, seed=args.seed + 1000, requests=args.warmup)
+            with RssSampler() as rss:
+                result = summarize(*await drive(client, scenario, args.concurrency, args.seed,
+                                                args.duration if args.requests is None else None, args.requests))
+            result["rss_mb"] = {"start": round(rss.start, 1), "peak": round(rss.peak, 1)}
+            results[name] = result
+            latency = result["latency_ms"]
+            print(f"{name:14s} {result['rps']:9.1f} req/s  p50 {latency['p50']:8.2f} ms  p95 {latency['p95']:8.2f} ms  "
+                  f"p99 {latency['p99']:8.2f} ms  errors {result['errors']:4d}  peak RSS {rss.peak:7.1f} MB",
+                  file=sys.stderr)
+    return results
+
+
+def main(args):
+    with tempfile.TemporaryDirectory(prefix="agrosense-loadtest-") as folder:
+        started = time.perf_counter()
+        stub = standins.prepare_environment(folder, args.trees, args.nominatim_delay_ms)
+        prepared_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        from app.main import app
+        standins.install_model_standins()
+        server, thread, base_url = start_server(app)
+        startup_s = time.perf_counter() - started
+        from app.services.model_registry import rss_mb
+        startup_rss = rss_mb()
+        print(f"stand-ins ready in {prepared_s:.1f} s, app started in {startup_s:.1f} s at {base_url}",
+              file=sys.stderr)
+
+        # Some routes print() progress; keep stdout for the report
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                routes = asyncio.run(run_routes(base_url, args))
+        finally:
+            server.should_exit = True
+            thread.join(timeout=30)
+            stub.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "startup": {"import_and_start_s": round(startup_s, 3), "rss_mb": round(startup_rss, 1)},
+        "routes": routes,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients per route")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per route")
+    parser.add_argument("--requests", type=int, help="requests per route (instead of --duration)")
+    parser.add_argument("--warmup", type=int, default=20, help="warm-up requests per route, not reported")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout, seconds")
+    parser.add_argument("--trees", type=int, default=100, help="trees in the stand-in yield forest")
+    parser.add_argument("--nominatim-delay-ms", type=float, default=50.0, help="stub response delay")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    main(parser.parse_args())
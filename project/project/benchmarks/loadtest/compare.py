@@ -0,0 +1,63 @@
+"""Compare two load-test reports route by route.
+
+Prints RPS and p50/p95/p99 latency of both runs and the relative change.
+With --max-regression, exits with status 1 if any route's p95 latency grew,
+or its RPS fell, by more than that percentage (for CI).
+
+Run from the project folder:
+    python -m benchmarks.loadtest.compare before.json after.json --max-regression 10
+"""
+import argparse
+import json
+import sys
+
+METRICS = [("rps", lambda r: r["rps"], 1), ("p50", lambda r: r["latency_ms"]["p50"], -1),
+           ("p95", lambda r: r["latency_ms"]["p95"], -1), ("p99", lambda r: r["latency_ms"]["p99"], -1)]
+
+
+def change(before, after):
+    return (after - before) / before * 100 if before else 0.0
+
+
+def describe(report):
+    git = report["meta"].get("git") or {}
+    revision = git.get("commit", "unknown")[:10] + (" (dirty)" if git.get("dirty") else "")
+    return f"{revision} at {report['meta']['timestamp']}"
+
+
+def main(args):
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+    print(f"before: {describe(before)}\nafter:  {describe(after)}")
+    print(f"peak RSS {before['peak_rss_mb']:.0f} -> {after['peak_rss_mb']:.0f} MB "
+          f"({change(before['peak_rss_mb'], after['peak_rss_mb']):+.1f}%)\n")
+
+    print(f"{'route':14s}" + "".join(f"  {name:>26s}" for name, _, _ in METRICS) + f"  {'errors':>14s}")
+    regressions = []
+    for route in before["routes"]:
+        if route not in after["routes"]:
+            continue
+        old, new = before["routes"][route], after["routes"][route]
+        cells = []
+        for name, value, better in METRICS:
+            delta = change(value(old), value(new))
+            cells.append(f"{value(old):8.1f} ->{value(new):8.1f} {delta:+5.0f}%")
+            # better = 1: higher is better (RPS); -1: lower is better (latency)
+            if args.max_regression is not None and name in ("rps", "p95") and -better * delta > args.max_regression:
+                regressions.append(f"{route} {name} {delta:+.1f}%")
+        print(f"{route:14s}" + "".join(f"  {cell}" for cell in cells)
+              + f"  {old['errors']:>6d} ->{new['errors']:>6d}")
+
+    if regressions:
+        print(f"\nregressions over {args.max_regression}%: " + ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--max-regression", type=float, help="fail on a worse p95 or RPS by more than this %%")
+    main(parser.parse_args())
@@ -0,0 +1,151 @@
+"""One scenario per route: how to build a request and what counts as success.
+
+Inputs are drawn from a per-worker seeded generator. Image and voice uploads
+are made unique per request (random trailing bytes / noise), so the result
+caches don't turn the run into a cache benchmark; logins reuse a few accounts,
+as real clients do.
+"""
+import io
+import itertools
+import wave
+
+import numpy as np
+
+from benchmarks.loadtest.standins import BOXES, CROPS, OUTSIDE, SOIL_TYPES, STATES
+
+PASSWORD = "load-test-password"
+
+
+class Scenario:
+    name = ""
+    method = "POST"
+    path = ""
+
+    async def setup(self, client):
+        """Runs once before the warm-up (e.g. creating accounts)."""
+
+    def request(self, rng):
+        """Keyword arguments for httpx.AsyncClient.request, minus method and url."""
+        raise NotImplementedError
+
+    def ok(self, response) -> bool:
+        return response.status_code == 200
+
+
+class PredictYield(Scenario):
+    name, path = "predict-yield", "/predict-yield"
+
+    def request(self, rng):
+        return {"json": {
+            "crop": CROPS[rng.integers(len(CROPS))],
+            "state": STATES[rng.integers(len(STATES))],
+            "area": round(float(rng.uniform(0.5, 20)), 2),
+            "fertilizer_used": round(float(rng.uniform(0, 250)), 1),
+        }}
+
+
+class SoilHealth(Scenario):
+    name, path = "soil-health", "/soil-health"
+
+    def request(self, rng):
+        body = {"soil_type": SOIL_TYPES[rng.integers(len(SOIL_TYPES))],
+                "location": STATES[rng.integers(len(STATES))], "has_npk": bool(rng.random() < 0.5)}
+        if body["has_npk"]:
+            body.update(N_ppm=float(rng.uniform(20, 300)), P_ppm=float(rng.uniform(2, 40)),
+                        K_ppm=float(rng.uniform(50, 400)))
+        return {"json": body}
+
+
+class GetState(Scenario):
+    name, path = "get-state", "/get-state"
+    # Share of points outside every stand-in boundary (answered by the Nominatim stub)
+    remote_share = 0.2
+
+    def request(self, rng):
+        if rng.random() < self.remote_share:
+            x0, y0, x1, y1 = OUTSIDE
+        else:
+            x0, y0, x1, y1 = list(BOXES.values())[rng.integers(len(BOXES))]
+        return {"json": {"lat": float(rng.uniform(y0, y1)), "lon": float(rng.uniform(x0, x1))}}
+
+
+class Signup(Scenario):
+    name, path = "auth-signup", "/api/v1/auth/signup"
+    _ids = itertools.count()
+
+    def request(self, rng):
+        return {"json": {"email": f"signup{next(self._ids)}-{rng.integers(1 << 30)}@loadtest.example",
+                         "password": PASSWORD}}
+
+
+class Login(Scenario):
+    name, path = "auth-login", "/api/v1/auth/login"
+    accounts = [f"login{i}@loadtest.example" for i in range(8)]
+
+    async def setup(self, client):
+        for email in self.accounts:
+            # 400 means the account exists from an earlier scenario run
+            await client.post("/api/v1/auth/signup", json={"email": email, "password": PASSWORD})
+
+    def request(self, rng):
+        return {"json": {"email": self.accounts[rng.integers(len(self.accounts))], "password": PASSWORD}}
+
+
+class MarketProfit(Scenario):
+    name, path = "market-profit", "/market/api/v1/market/profit"
+
+    def request(self, rng):
+        supply, demand, cost, price = rng.uniform(1, 1000, 4).round(2).tolist()
+        return {"json": {"supply": supply, "demand": demand, "cost": cost, "price": price}}
+
+
+class ImageInput(Scenario):
+    name, path = "image-input", "/image/image-input"
+    size = (640, 480)
+
+    def __init__(self):
+        from PIL import Image
+
+        rng = np.random.default_rng(0)
+        self.images = []
+        for _ in range(8):
+            # Smooth colour fields compress like photos; pure noise would not
+            low = rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)
+            image = Image.fromarray(low).resize(self.size, Image.BICUBIC)
+            buf = io.BytesIO()
+            image.save(buf, format="JPEG", quality=85)
+            self.images.append(buf.getvalue())
+
+    def request(self, rng):
+        # Decoders stop at the end-of-image marker; the suffix only changes the cache key
+        data = self.images[rng.integers(len(self.images))] + rng.bytes(16)
+        return {"files": {"file": ("leaf.jpg", data, "image/jpeg")}}
+
+    def ok(self, response):
+        # Failed inferences also come back as 200, with {"result": {"error": ...}}
+        return response.status_code == 200 and "class_name" in response.json().get("result", {})
+
+
+class VoiceInput(Scenario):
+    name, path = "voice-input", "/voice/voice-input"
+    sample_rate = 16000
+    seconds = (1.0, 4.0)
+
+    def request(self, rng):
+        n = int(rng.uniform(*self.seconds) * self.sample_rate)
+        t = np.arange(n) / self.sample_rate
+        signal = 0.3 * np.sin(2 * np.pi * rng.uniform(100, 400) * t) + rng.normal(0, 0.05, n)
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes((np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes())
+        return {"files": {"audio": ("clip.wav", buf.getvalue(), "audio/wav")}}
+
+    def ok(self, response):
+        return response.status_code == 200 and "text" in response.json()
+
+
+SCENARIOS = {cls.name: cls for cls in
+             (PredictYield, SoilHealth, GetState, Signup, Login, MarketProfit, ImageInput, VoiceInput)}
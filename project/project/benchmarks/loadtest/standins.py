@@ -0,0 +1,204 @@
+"""Small stand-ins for everything the app would otherwise download or call out to.
+
+    sklearn artifacts   yield / best-time / soil forests trained on synthetic
+                        rows, saved in the same joblib layout as models/*.pkl
+    tiny CNN            replaces ResNet50 (same 1000 ImageNet outputs)
+    fake Whisper        returns a fixed-form transcript after a short STFT of
+                        the waveform, so its cost still grows with clip length
+    state boundaries    four rectangles standing in for the state polygons
+    Nominatim stub      local HTTP server answering /reverse after a fixed delay
+
+Everything is seeded, so two runs (on two commits) serve identical models and
+inputs.
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+CROPS = ["Rice", "Wheat", "Maize", "Cotton", "Sugarcane", "Soyabean"]
+STATES = ["Maharashtra", "Punjab", "Uttar Pradesh", "Kerala"]
+SOIL_TYPES = ["Black", "Red", "Alluvial", "Laterite"]
+SEASONS = ["Kharif", "Rabi", "Zaid"]
+
+# (min_lon, min_lat, max_lon, max_lat) per stand-in state
+BOXES = {
+    "Maharashtra": (73.0, 16.0, 80.0, 22.0),
+    "Punjab": (74.0, 29.5, 77.0, 32.5),
+    "Uttar Pradesh": (77.5, 24.0, 84.0, 29.0),
+    "Kerala": (75.0, 8.5, 77.0, 12.5),
+}
+# Points here are in no box, so /get-state falls back to the Nominatim stub
+OUTSIDE = (60.0, 5.0, 68.0, 20.0)
+REMOTE_STATE = "Lakshadweep"
+
+
+# ==============================
+# Tabular models
+# ==============================
+def write_tabular_models(folder, trees=100, rows=20000, seed=0):
+    """Train and dump the three joblib artifacts; returns {env var: path}."""
+    import joblib
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.tree import DecisionTreeClassifier
+
+    rng = np.random.default_rng(seed)
+    crop, state = rng.integers(0, len(CROPS), rows), rng.integers(0, len(STATES), rows)
+    fertilizer = rng.uniform(0, 250, rows)
+    yield_per_ha = 1 + crop * 0.6 + state * 0.3 + np.sqrt(fertilizer) * 0.1 + rng.normal(0, 0.3, rows)
+    optimum = 80 + crop * 12 + rng.normal(0, 5, rows)
+    X = pd.DataFrame({"Crop": crop, "State": state, "Fertilizer": fertilizer})
+    yield_model = RandomForestRegressor(trees, random_state=seed).fit(X, np.c_[yield_per_ha, optimum])
+
+    X = pd.DataFrame({"Crop": crop, "State": state})
+    season = (crop + 2 * state + rng.integers(0, 2, rows)) % len(SEASONS)
+    best_time_model = DecisionTreeClassifier(random_state=seed).fit(X, season)
+
+    soil = rng.integers(0, len(SOIL_TYPES), rows)
+    X = pd.DataFrame({"Soil_Type": soil, "State": state})
+    npk = np.c_[60 + soil * 40, 5 + state * 3, 100 + soil * 50] + rng.uniform(0, 20, (rows, 3))
+    soil_model = RandomForestRegressor(max(1, trees // 4), random_state=seed).fit(X, npk)
+
+    artifacts = {
+        "Yield_model": {"Yield_model": yield_model, "Yield_categories": {"Crop": CROPS, "State": STATES}},
+        "Best_time": {
+            "Best_time_model": best_time_model,
+            "Best_time_input_categories": {"Crop": CROPS, "State": STATES},
+            "Best_time_output_encoders": {"Best_time": SEASONS},
+        },
+        "Soil_model": {"Soil_model": soil_model, "Soil_categories": {"Soil_Type": SOIL_TYPES, "State": STATES}},
+    }
+    paths = {}
+    for name, artifact in artifacts.items():
+        paths[name] = os.path.join(folder, f"{name}.pkl")
+        joblib.dump(artifact, paths[name])
+    return paths
+
+
+def write_state_boundaries(folder):
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"name": state},
+            "geometry": {"type": "Polygon", "coordinates": [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]},
+        }
+        for state, (x0, y0, x1, y1) in BOXES.items()
+    ]
+    path = os.path.join(folder, "states.geojson")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    return path
+
+
+# ==============================
+# Torch / Whisper stand-ins
+# ==============================
+def tiny_cnn(num_classes=1000, seed=0):
+    """A few-layer CNN taking the same (N, 3, 224, 224) batches as ResNet50."""
+    import torch
+    from torch import nn
+
+    torch.manual_seed(seed)
+    model = nn.Sequential(
+        nn.Conv2d(3, 16, 3, stride=2, padding=1), nn.ReLU(),
+        nn.Conv2d(16, 32, 3, stride=2, padding=1), nn.ReLU(),
+        nn.Conv2d(32, 64, 3, stride=2, padding=1), nn.ReLU(),
+        nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(64, num_classes),
+    )
+    model.eval()
+    return model
+
+
+class FakeWhisper:
+    """transcribe() with Whisper's signature and result shape."""
+
+    sample_rate = 16000
+
+    def transcribe(self, audio, **options):
+        if isinstance(audio, str):
+            # Temp-file fallback of process_voice_input; size is all we need
+            audio = np.zeros(os.path.getsize(audio) // 2, dtype=np.float32)
+        seconds = len(audio) / self.sample_rate
+        # 25 ms windows every 10 ms, like Whisper's log-mel front end
+        frames = np.lib.stride_tricks.sliding_window_view(audio, 400)[::160]
+        energy = np.log10(np.abs(np.fft.rfft(frames * np.hanning(400), axis=1)) ** 2 + 1e-10).mean()
+        text = f"stand-in transcript of {seconds:.1f} seconds (energy {energy:.2f})"
+        return {"text": text, "segments": [], "language": options.get("language") or "en"}
+
+
+# ==============================
+# Nominatim stub
+# ==============================
+class _NominatimHandler(BaseHTTPRequestHandler):
+    delay_s = 0.0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        time.sleep(self.delay_s)
+        body = json.dumps({
+            "lat": query.get("lat", [""])[0],
+            "lon": query.get("lon", [""])[0],
+            "address": {"state": REMOTE_STATE, "country": "India"},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_nominatim_stub(delay_ms=50.0):
+    """Serve the stub on a free local port; returns (server, reverse-geocoding URL)."""
+    handler = type("NominatimHandler", (_NominatimHandler,), {"delay_s": delay_ms / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="nominatim-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/reverse"
+
+
+# ==============================
+# Wiring
+# ==============================
+def prepare_environment(folder, trees=100, nominatim_delay_ms=50.0):
+    """Write the stand-ins to `folder` and point the app's settings at them.
+
+    Must run before app.main is imported: the settings are read at import.
+    Paths are always overridden; other settings only get a default, so they
+    can still be set from the shell (e.g. BCRYPT_ROUNDS, TREE_ENGINE).
+    """
+    server, nominatim_url = start_nominatim_stub(nominatim_delay_ms)
+    os.makedirs(os.path.join(folder, "logs"), exist_ok=True)
+    os.environ.update(write_tabular_models(folder, trees))
+    os.environ.update(
+        STATE_BOUNDARIES_PATH=write_state_boundaries(folder),
+        NOMINATIM_URL=nominatim_url,
+        DATABASE_PATH=os.path.join(folder, "agrosense.db"),
+        RESULT_CACHE_PATH=os.path.join(folder, "result_cache.db"),
+        LOG_DIR=os.path.join(folder, "logs"),
+        # The torch/Whisper stand-ins are installed in this process's model
+        # registry, which process-pool workers wouldn't see
+        VISION_POOL_KIND="thread",
+        SPEECH_POOL_KIND="thread",
+    )
+    os.environ.setdefault("LOG_CONSOLE", "false")
+    os.environ.setdefault("GEOCODE_REMOTE_FALLBACK", "true")
+    return server
+
+
+def install_model_standins():
+    """Swap ResNet50 and Whisper for the stand-ins (call after importing app.main)."""
+    from app.services.model_registry import registry
+    from app.services.speech_engine import SPEECH_MODELS
+
+    registry.register("resnet50", tiny_cnn)
+    # Every configured size (WHISPER_MODEL, WHISPER_SHORT_MODEL)
+    for name in SPEECH_MODELS:
+        registry.register(name, FakeWhisper)
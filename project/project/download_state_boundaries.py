@@ -0,0 +1,39 @@
+import json
+import os
+import urllib.request
+
+# Natural Earth 1:10m admin-1 boundaries (public domain); we keep only India
+url = "https://raw.githubusercontent.com/nvkelso/natural-earth-vector/master/geojson/ne_10m_admin_1_states_provinces.geojson"
+
+# Ensure directory exists
+os.makedirs("app/data", exist_ok=True)
+
+save_path = "app/data/india_states.geojson"
+
+with urllib.request.urlopen(url) as response:
+    world = json.load(response)
+
+def rounded(coords):
+    # ~10 m precision is plenty for state lookup and keeps the file small
+    if isinstance(coords[0], (int, float)):
+        return [round(coords[0], 4), round(coords[1], 4)]
+    return [rounded(c) for c in coords]
+
+features = []
+for feature in world["features"]:
+    props = feature["properties"]
+    if props.get("adm0_a3") != "IND":
+        continue
+    features.append({
+        "type": "Feature",
+        "properties": {"name": props["name"]},
+        "geometry": {
+            "type": feature["geometry"]["type"],
+            "coordinates": rounded(feature["geometry"]["coordinates"]),
+        },
+    })
+
+with open(save_path, "w", encoding="utf-8") as f:
+    json.dump({"type": "FeatureCollection", "features": features}, f, separators=(",", ":"))
+
+print(f"✅ {len(features)} state boundaries saved:", save_path)
@@ -0,0 +1,60 @@
+"""Export the crop disease classifier to TorchScript with int8 dynamic quantization.
+
+Takes a fine-tuned state_dict whose head matches app/services/disease_classes.txt
+(e.g. MobileNetV3 trained on PlantVillage). Without --checkpoint it exports the
+architecture with untrained weights, which is only useful to exercise the
+pipeline and benchmarks.
+
+    python export_disease_model.py --checkpoint disease_mobilenet_v3.pth
+"""
+import argparse
+import os
+
+import torch
+from torch import nn
+from torchvision import models
+
+ARCHS = {
+    "mobilenet_v3_small": models.mobilenet_v3_small,
+    "mobilenet_v3_large": models.mobilenet_v3_large,
+    "efficientnet_b0": models.efficientnet_b0,
+}
+
+
+def build_model(arch: str, num_classes: int, checkpoint: str = None) -> nn.Module:
+    model = ARCHS[arch](weights=None)
+    # Swap the ImageNet head for one with a class per disease label
+    head = model.classifier[-1]
+    model.classifier[-1] = nn.Linear(head.in_features, num_classes)
+    if checkpoint:
+        model.load_state_dict(torch.load(checkpoint, map_location="cpu", weights_only=True))
+    return model.eval()
+
+
+def export(model: nn.Module, output: str, quantize: bool = True):
+    if quantize:
+        # Dynamic int8 covers the Linear layers (the classifier head); convs stay
+        # fp32 since static conv quantization needs calibration images
+        model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(model, torch.zeros(1, 3, 224, 224)))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    torch.jit.save(scripted, output)
+    return scripted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--checkpoint", help="fine-tuned state_dict (.pth)")
+    parser.add_argument("--arch", choices=sorted(ARCHS), default="mobilenet_v3_small")
+    parser.add_argument("--labels", default="app/services/disease_classes.txt")
+    parser.add_argument("--output", default="models/disease_mobilenet_v3_int8.pt")
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.labels) as f:
+        labels = [line.strip() for line in f if line.strip()]
+    if not args.checkpoint:
+        print("⚠️  No --checkpoint given: exporting untrained weights (pipeline testing only)")
+    export(build_model(args.arch, len(labels), args.checkpoint), args.output, quantize=not args.no_quantize)
+    print(f"✅ Exported {args.arch} ({len(labels)} classes) to {args.output}")
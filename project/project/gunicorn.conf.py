@@ -0,0 +1,28 @@
+# gunicorn.conf.py
+# Multi-worker deployment with models shared between workers:
+#
+#   MODEL_MMAP=true gunicorn -c gunicorn.conf.py app.main:app
+#
+# The app is imported and every model loaded once in the master, then workers
+# are forked. Weights that are never written (sklearn tree buffers, memory-
+# mapped ResNet50 tensors, Whisper's fp32 weights) stay shared copy-on-write
+# instead of being copied per worker. GET /health/models in each worker
+# reports unique vs shared memory.
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(4, multiprocessing.cpu_count()))))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before any fork
+    from app.services.model_registry import registry
+    registry.preload(background=False)
+    server.log.info("Models preloaded before fork: %s", registry.status()["models"])
+    # Move everything allocated so far out of the GC's reach, so collections
+    # in the workers don't touch (and un-share) those pages
+    gc.freeze()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import List
+from typing import Dict, List, Optional, Union
 
 class SignupInput(BaseModel):
     email: EmailStr
@@ -26,5 +26,47 @@ class MarketOutput(BaseModel):
     profit: float
     supply_status: str
 
+class MarketRange(BaseModel):
+    start: float
+    stop: float  # inclusive
+    step: float
+
+class MarketBatchRequest(BaseModel):
+    supply: Union[float, List[float], MarketRange]
+    demand: Union[float, List[float], MarketRange]
+    cost: Union[float, List[float], MarketRange]
+    price: Union[float, List[float], MarketRange]
+    mode: str = "zip"  # "zip" pairs lists element-wise, "grid" takes every combination
+
+class MarketPoint(BaseModel):
+    index: int
+    supply: float
+    demand: float
+    cost: float
+    price: float
+
+class MarketSummary(BaseModel):
+    rows: int
+    total_profit: float
+    mean_profit: float
+    min_profit: float
+    max_profit: float
+    max_profit_point: MarketPoint
+    break_even_price: Optional[float]
+    profitable: int
+    loss_making: int
+    status_counts: Dict[str, int]
+
+class MarketBatchOutput(BaseModel):
+    columns: Dict[str, list]
+    summary: MarketSummary
+
 class GuidelineOutput(BaseModel):
-    recommendations: List[str]
\ No newline at end of file
+    recommendations: List[str]
+
+class DiagnosisOutput(BaseModel):
+    label: str
+    crop: str
+    disease: str
+    confidence: float
+    recommendations: List[str]
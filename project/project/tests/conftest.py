@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Importing app modules starts the logger; keep test runs out of the tracked logs/
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="agrosense-test-logs-"))
+os.environ.setdefault("LOG_CONSOLE", "false")
@@ -0,0 +1,83 @@
+"""Compiled tree models must predict exactly what sklearn predicts."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, ExtraTreesRegressor, RandomForestClassifier, RandomForestRegressor
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+
+from app.services.tree_engine import TREE_ENGINE_MAX_ROWS, compile_model, predict_rows, probe_rows
+
+COLUMNS = ["Crop", "State", "Fertilizer"]
+ROWS = 2000
+
+
+def training_data(seed=0):
+    # Category codes plus one continuous column, like the yield / soil models
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "Crop": rng.integers(0, 6, ROWS),
+        "State": rng.integers(0, 4, ROWS),
+        "Fertilizer": rng.uniform(0, 250, ROWS),
+    })
+    signal = X["Crop"] * 0.6 + X["State"] * 0.3 + np.sqrt(X["Fertilizer"]) * 0.1 + rng.normal(0, 0.3, ROWS)
+    return X, signal.to_numpy(), rng
+
+
+def targets(kind, signal, rng):
+    if kind == "regression":
+        return signal
+    if kind == "multi_regression":
+        return np.c_[signal, signal ** 2 + rng.normal(0, 0.1, ROWS)]
+    if kind == "int_labels":
+        return np.digitize(signal, [1.5, 2.5, 3.5])
+    if kind == "str_labels":
+        return np.array(["Kharif", "Rabi", "Zaid"])[np.digitize(signal, [2.0, 3.0])]
+    if kind == "multi_str_labels":
+        return np.c_[np.array(["low", "high"])[(signal > 2.5).astype(int)],
+                     np.array(["a", "b", "c"])[np.digitize(signal, [1.5, 3.5])]]
+    raise ValueError(kind)
+
+
+REGRESSORS = [DecisionTreeRegressor, RandomForestRegressor, ExtraTreesRegressor]
+CLASSIFIERS = [DecisionTreeClassifier, RandomForestClassifier, ExtraTreesClassifier]
+CASES = ([(cls, kind) for cls in REGRESSORS for kind in ("regression", "multi_regression")]
+         + [(cls, kind) for cls in CLASSIFIERS for kind in ("int_labels", "str_labels", "multi_str_labels")])
+
+
+def parity_rows(compiled, rng):
+    """Rows on and around every split threshold, random rows, and category codes outside the fitted range."""
+    random = np.c_[rng.integers(0, 6, 300), rng.integers(0, 4, 300), rng.uniform(0, 250, 300)]
+    out_of_range = np.array([[-1, 0, 10.0], [6, 3, 0.0], [99, -5, 1e6], [0, 4, -20.0], [-100, 100, 250.0]])
+    return np.vstack([probe_rows(compiled), random, out_of_range])
+
+
+@pytest.mark.parametrize("fit_on_frame", [True, False], ids=["frame", "array"])
+@pytest.mark.parametrize("estimator_cls, kind", CASES, ids=[f"{c.__name__}-{k}" for c, k in CASES])
+def test_compiled_matches_sklearn(estimator_cls, kind, fit_on_frame):
+    X, signal, rng = training_data()
+    single_tree = estimator_cls in (DecisionTreeClassifier, DecisionTreeRegressor)
+    kwargs = {"max_depth": 12} if single_tree else {"n_estimators": 15}
+    estimator = estimator_cls(random_state=0, **kwargs).fit(X if fit_on_frame else X.to_numpy(), targets(kind, signal, rng))
+
+    compiled = compile_model(estimator, COLUMNS)
+    assert compiled is not None, "the load-time probe fell back to sklearn"
+    artifacts = {"model": estimator, "compiled": compiled}
+
+    rows = parity_rows(compiled, rng)
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    expected = estimator.predict(frame if fit_on_frame else rows)
+    # predict_rows only takes the compiled path up to TREE_ENGINE_MAX_ROWS rows
+    for start in range(0, len(rows), TREE_ENGINE_MAX_ROWS):
+        chunk = rows[start:start + TREE_ENGINE_MAX_ROWS]
+        got = predict_rows(artifacts, chunk.tolist(), COLUMNS)
+        assert np.array_equal(got, expected[start:start + TREE_ENGINE_MAX_ROWS])
+    assert np.array_equal(compiled.predict(rows), expected)
+
+
+def test_nan_rows_go_to_sklearn():
+    X, signal, rng = training_data()
+    estimator = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, signal)
+    artifacts = {"model": estimator, "compiled": compile_model(estimator, COLUMNS)}
+    rows = [[1, 2, np.nan], [0, 0, 50.0]]
+    expected = estimator.predict(pd.DataFrame(rows, columns=COLUMNS))
+    assert np.array_equal(predict_rows(artifacts, rows, COLUMNS), expected)